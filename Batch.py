@@ -0,0 +1,308 @@
+# Evaluación vectorizada de muchas posiciones a la vez con NumPy, para análisis masivo. Cada posición se
+# codifica como 12 planos de 64 casillas (uno por clave de pieza, en el orden de Bitboard.PIECE_KEYS, con
+# índice fila * 8 + columna). Material y casillas salen de un producto de matrices para todo el lote, y la
+# movilidad de desplazamientos y rellenos de bitboards sobre arrays de uint64.
+# Rendimiento: no se llega al orden de magnitud que se buscaba. Con lotes de 4096, evaluar (movilidad
+# incluida) cuesta unos 2 us por posición, frente a 7-10 us de Evaluation.evaluate, que recalcula desde
+# cero sin movilidad: unas 4 veces menos. Board.eval() es incremental (alrededor de 1 us) y sigue siendo
+# lo más rápido si ya se tiene el tablero; el lote solo compensa cuando se parte de texto. De principio a
+# fin son unos 5 us por posición, casi a medias entre decodificar los FEN y evaluar.
+# --compare mide cada parte con el primer lote.
+# La misma codificación sirve para exportar datos de entrenamiento. Uso:
+#   python Batch.py posiciones.fen --batch-size 4096 --export planos.npz --scores puntuaciones.npy
+import argparse
+import sys
+import time
+
+import numpy as np
+
+import Bitboard
+import Evaluation
+import Model as m
+
+PLANE_KEYS = Bitboard.PIECE_KEYS
+PLANES = len(PLANE_KEYS)
+# Código de cada casilla de Board.squares: índice del plano, o PLANES si está vacía
+SQUARE_CODES = {key: i for i, key in enumerate(PLANE_KEYS)}
+SQUARE_CODES[None] = PLANES
+DEFAULT_BATCH_SIZE = 4096
+
+# Centipeones por casilla alcanzable (movilidad pseudo-legal: no tiene en cuenta clavadas ni jaques)
+MOBILITY_WEIGHTS = {"knight": 4, "bishop": 5, "rook": 2, "queen": 1}
+
+
+def _signed_values(values):
+    # Tabla (12, 64) con solo el material, con signo como en Evaluation
+    return np.array(
+        [[values[key.split("_")[0]] * (1 if key.endswith("w") else -1)] * 64 for key in PLANE_KEYS],
+        dtype=np.int64,
+    )
+
+
+MG_WEIGHTS = np.array([Evaluation.MG_TABLES[key] for key in PLANE_KEYS], dtype=np.int64)
+EG_WEIGHTS = np.array([Evaluation.EG_TABLES[key] for key in PLANE_KEYS], dtype=np.int64)
+MG_MATERIAL = _signed_values(Evaluation.MG_VALUES)
+EG_MATERIAL = _signed_values(Evaluation.EG_VALUES)
+PHASE_WEIGHTS = np.array([Evaluation.PHASE[key] for key in PLANE_KEYS], dtype=np.int64)
+# Columnas: medio juego y final completos, y medio juego y final solo con el material. Las sumas son
+# enteros pequeños, exactos en float32, y así el producto va por BLAS.
+TERM_WEIGHTS = np.stack(
+    [table.reshape(-1) for table in (MG_WEIGHTS, EG_WEIGHTS, MG_MATERIAL, EG_MATERIAL)], axis=1
+).astype(np.float32)
+
+# Desplazamientos como (bits, máscara de casillas válidas tras desplazar): al mover una columna a la
+# derecha no se puede acabar en la columna a (sería dar la vuelta por el borde)
+FULL = np.uint64(0xFFFFFFFFFFFFFFFF)
+NOT_COL_A = np.uint64(0xFEFEFEFEFEFEFEFE)
+NOT_COL_AB = np.uint64(0xFCFCFCFCFCFCFCFC)
+NOT_COL_H = np.uint64(0x7F7F7F7F7F7F7F7F)
+NOT_COL_GH = np.uint64(0x3F3F3F3F3F3F3F3F)
+STRAIGHT_SHIFTS = [(1, NOT_COL_A), (-1, NOT_COL_H), (8, FULL), (-8, FULL)]
+DIAGONAL_SHIFTS = [(9, NOT_COL_A), (7, NOT_COL_H), (-7, NOT_COL_A), (-9, NOT_COL_H)]
+KNIGHT_SHIFTS = [
+    (17, NOT_COL_A), (15, NOT_COL_H), (10, NOT_COL_AB), (6, NOT_COL_GH),
+    (-17, NOT_COL_H), (-15, NOT_COL_A), (-10, NOT_COL_GH), (-6, NOT_COL_AB),
+]
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+# Decodificación rápida de FEN: las filas de todo el lote se unen en un texto, se quitan las '/', los
+# dígitos se expanden a '.' con str.replace y cada byte se traduce a su código de casilla con una tabla
+# (255 = carácter no válido). FEN_EXPAND solo se usa para localizar un FEN con casillas de más o de menos.
+FEN_EXPAND = str.maketrans({**{str(n): "." * n for n in range(1, 9)}, "/": None})
+BYTE_CODES = np.full(256, 255, dtype=np.uint8)
+BYTE_CODES[ord(".")] = PLANES
+BYTE_CODES[[ord(letter) for letter in m.FEN_PIECES]] = [SQUARE_CODES[key] for key in m.FEN_PIECES.values()]
+
+
+def encode_boards(boards):
+    # Devuelve (planos uint8 de forma (N, 12, 64), white_to_move bool de forma (N,)) para una lista de Board
+    codes = np.array([[SQUARE_CODES[key] for key in board.squares] for board in boards], dtype=np.uint8)
+    white_to_move = np.array([board.turn == "w" for board in boards], dtype=bool)
+    return _planes_from_codes(codes), white_to_move
+
+
+def encode_fens(fens):
+    # Como encode_boards pero directamente desde FEN, sin crear tableros. Solo se comprueba que cada FEN
+    # tenga 64 casillas con piezas válidas y turno (para validarlo del todo, Model.parse_fen).
+    fields = [fen.split(None, 2) for fen in fens]
+    for fen, parts in zip(fens, fields):
+        if len(parts) < 2 or parts[1] not in ("w", "b"):
+            raise ValueError(f"FEN no válido: {fen!r}")
+    white_to_move = np.array([parts[1] == "w" for parts in fields], dtype=bool)
+    text = "".join([parts[0] + "\n" for parts in fields]).replace("/", "")
+    for n in range(8, 0, -1):
+        text = text.replace(str(n), "." * n)
+    # Cada tablero ocupa 64 bytes más el '\n'; si alguno tiene otra longitud los separadores se desplazan
+    data = np.frombuffer(text.encode("ascii", errors="replace"), dtype=np.uint8)
+    if len(data) != 65 * len(fens) or (data.reshape(len(fens), 65)[:, 64] != ord("\n")).any():
+        for fen, parts in zip(fens, fields):
+            if len(parts[0].translate(FEN_EXPAND)) != 64:
+                raise ValueError(f"FEN sin 64 casillas: {fen!r}")
+    codes = BYTE_CODES[data.reshape(len(fens), 65)[:, :64]]
+    invalid = np.flatnonzero((codes == 255).any(axis=1))
+    if len(invalid):
+        raise ValueError(f"Carácter no válido en FEN: {fens[invalid[0]]!r}")
+    return _planes_from_codes(codes), white_to_move
+
+
+def _planes_from_codes(codes):
+    return (codes[:, None, :] == np.arange(PLANES, dtype=np.uint8)[None, :, None]).astype(np.uint8)
+
+
+def _tapered(mg, eg, phase):
+    # Igual que Evaluation.tapered, desde el punto de vista de las blancas
+    phase = np.minimum(phase, Evaluation.MAX_PHASE)
+    return (mg * phase + eg * (Evaluation.MAX_PHASE - phase)) // Evaluation.MAX_PHASE
+
+
+def to_bitboards(planes):
+    # Planos (N, 12, 64) -> array (N, 12) de uint64 con bit = fila * 8 + columna, como en Bitboard
+    return np.packbits(planes, axis=-1, bitorder="little").view("<u8")[:, :, 0]
+
+
+def popcount(bitboards):
+    # Bits a 1 de cada entero; np.bitwise_count solo existe desde NumPy 2.0, antes se usa la tabla por bytes
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(bitboards).astype(np.int64)
+    bitboards = np.ascontiguousarray(bitboards)
+    return POPCOUNT[bitboards.view(np.uint8)].reshape(bitboards.shape + (8,)).sum(axis=-1, dtype=np.int64)
+
+
+def _shift(bitboards, shift, mask):
+    if shift > 0:
+        return (bitboards << np.uint64(shift)) & mask
+    return (bitboards >> np.uint64(-shift)) & mask
+
+
+def _jump_reach(pieces, not_own):
+    # Casillas alcanzables sumadas para todos los caballos. Un mismo salto lleva cada caballo a una
+    # casilla distinta, así que contar los bits de cada desplazamiento da la suma pieza a pieza.
+    total = np.zeros(pieces.shape, dtype=np.int64)
+    for shift, mask in KNIGHT_SHIFTS:
+        total += popcount(_shift(pieces, shift, mask) & not_own)
+    return total
+
+
+def _slider_reach(pieces, empty, not_own, shifts):
+    # Lo mismo para piezas de largo alcance: en cada dirección el rayo de una pieza se para en la
+    # primera casilla ocupada, así que los rayos de dos piezas no se solapan
+    total = np.zeros(pieces.shape, dtype=np.int64)
+    for shift, mask in shifts:
+        ray = _shift(pieces, shift, mask)
+        flood = ray
+        for _ in range(6):
+            ray = _shift(ray & empty, shift, mask)
+            flood |= ray
+        total += popcount(flood & not_own)
+    return total
+
+
+def mobility(planes, bitboards=None):
+    # Movilidad pseudo-legal ponderada (blancas menos negras) de caballos y piezas de largo alcance.
+    # Una casilla es alcanzable si no la ocupa una pieza propia y ninguna casilla intermedia está ocupada.
+    # Las piezas de cada tipo y color se procesan juntas como filas de un mismo array.
+    if bitboards is None:
+        bitboards = to_bitboards(planes)
+    white = np.bitwise_or.reduce(bitboards[:, :6], axis=1)
+    black = np.bitwise_or.reduce(bitboards[:, 6:], axis=1)
+    empty = ~(white | black)
+
+    def rows(names):
+        # (piezas, casillas no propias) con una fila por nombre, en blancas y luego en negras
+        pieces = np.stack([bitboards[:, SQUARE_CODES[f"{name}_{color}"]] for color in "wb" for name in names])
+        not_own = np.stack([~own for own in (white, black) for _ in names])
+        return pieces, not_own
+
+    diagonal_names = ["bishop", "queen"]
+    straight_names = ["rook", "queen"]
+    knights, knight_not_own = rows(["knight"])
+    diagonal, diagonal_not_own = rows(diagonal_names)
+    straight, straight_not_own = rows(straight_names)
+    knight_reach = _jump_reach(knights, knight_not_own)
+    diagonal_reach = _slider_reach(diagonal, empty, diagonal_not_own, DIAGONAL_SHIFTS)
+    straight_reach = _slider_reach(straight, empty, straight_not_own, STRAIGHT_SHIFTS)
+
+    total = np.zeros(len(planes), dtype=np.int64)
+    for side, sign in ((0, 1), (1, -1)):
+        total += sign * MOBILITY_WEIGHTS["knight"] * knight_reach[side]
+        for names, reach in ((diagonal_names, diagonal_reach), (straight_names, straight_reach)):
+            for i, name in enumerate(names):
+                total += sign * MOBILITY_WEIGHTS[name] * reach[side * len(names) + i]
+    return total
+
+
+def evaluate_batch(planes, white_to_move):
+    # Evalúa el lote y devuelve {"material", "pst", "mobility", "score"}, arrays (N,) de enteros desde el
+    # punto de vista del bando que mueve. material + pst coincide con Board.eval() de cada posición;
+    # score suma además la movilidad.
+    bitboards = to_bitboards(planes)
+    terms = np.rint(planes.reshape(len(planes), -1).astype(np.float32) @ TERM_WEIGHTS).astype(np.int64)
+    phase = popcount(bitboards) @ PHASE_WEIGHTS
+    static = _tapered(terms[:, 0], terms[:, 1], phase)
+    material = _tapered(terms[:, 2], terms[:, 3], phase)
+    sign = np.where(white_to_move, 1, -1)
+    result = {
+        "material": sign * material,
+        "pst": sign * (static - material),
+        "mobility": sign * mobility(planes, bitboards),
+    }
+    result["score"] = sign * static + result["mobility"]
+    return result
+
+
+def pack(planes):
+    # Planos empaquetados a bits: (N, 12, 8) uint8, 96 bytes por posición en lugar de 768
+    return np.packbits(planes, axis=-1)
+
+
+def export(path, packed_planes, white_to_move, **arrays):
+    # Guarda datos de entrenamiento (.npz): los planos ya empaquetados con pack() y cualquier array
+    # adicional por posición, como las puntuaciones
+    np.savez_compressed(path, planes=packed_planes, white_to_move=white_to_move, **arrays)
+
+
+def load(path):
+    # Lee un fichero de export y devuelve {nombre: array} con los planos ya desempaquetados
+    with np.load(path) as data:
+        arrays = {name: data[name] for name in data.files}
+    arrays["planes"] = np.unpackbits(arrays["planes"], axis=-1)
+    return arrays
+
+
+def iter_fen_batches(stream, batch_size=DEFAULT_BATCH_SIZE):
+    # Agrupa las líneas FEN (o EPD) de un fichero en listas de batch_size; ignora vacías y comentarios
+    batch = []
+    for line in stream:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        batch.append(line)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _print_comparison(fens, encode_time, eval_time):
+    # Microsegundos por posición del lote frente a evaluar tablero a tablero
+    boards = [m.Board.from_fen(fen) for fen in fens]
+    timings = {}
+    for name, evaluate in (("Evaluation.evaluate", Evaluation.evaluate), ("Board.eval", m.Board.eval)):
+        start = time.perf_counter()
+        for board in boards:
+            evaluate(board)
+        timings[name] = (time.perf_counter() - start) / len(boards) * 1e6
+    print(f"per position: Evaluation.evaluate {timings['Evaluation.evaluate']:.2f} us, "
+          f"Board.eval {timings['Board.eval']:.2f} us; batched: evaluation (with mobility) "
+          f"{eval_time / len(fens) * 1e6:.2f} us, FEN decoding {encode_time / len(fens) * 1e6:.2f} us",
+          file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluación vectorizada de posiciones FEN con NumPy")
+    parser.add_argument("path", help="fichero con un FEN por línea")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--export", default=None, help="fichero .npz con los planos y las puntuaciones")
+    parser.add_argument("--scores", default=None, help="fichero .npy con la puntuación de cada posición")
+    parser.add_argument("--compare", action="store_true",
+                        help="mide también la evaluación posición a posición del primer lote")
+    args = parser.parse_args()
+
+    # Para exportar solo se guardan los planos empaquetados de cada lote
+    packed_out = []
+    turns_out = []
+    scores_out = []
+    positions = 0
+    encode_time = 0.0
+    eval_time = 0.0
+    start = time.perf_counter()
+    with open(args.path, encoding="utf-8") as f:
+        for fens in iter_fen_batches(f, args.batch_size):
+            encode_start = time.perf_counter()
+            planes, white_to_move = encode_fens(fens)
+            eval_start = time.perf_counter()
+            result = evaluate_batch(planes, white_to_move)
+            encode_time += eval_start - encode_start
+            eval_time += time.perf_counter() - eval_start
+            if args.compare and positions == 0:
+                _print_comparison(fens, encode_time, eval_time)
+            positions += len(fens)
+            scores_out.append(result["score"])
+            if args.export:
+                packed_out.append(pack(planes))
+                turns_out.append(white_to_move)
+
+    elapsed = time.perf_counter() - start
+    scores = np.concatenate(scores_out) if scores_out else np.zeros(0, dtype=np.int64)
+    if args.scores:
+        np.save(args.scores, scores)
+    if args.export and packed_out:
+        export(args.export, np.concatenate(packed_out), np.concatenate(turns_out), scores=scores)
+    rate = positions / elapsed if elapsed > 0 else 0
+    print(f"{positions} positions in {elapsed:.2f}s ({rate:.0f} positions/s, "
+          f"decoding {encode_time:.2f}s, evaluation {eval_time:.2f}s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
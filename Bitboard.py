@@ -0,0 +1,318 @@
+# Motor opcional de generación de movimientos con bitboards. Cada tipo de pieza y color se guarda
+# como un entero de 64 bits (bit = fila * 8 + columna) y los ataques salen de tablas precalculadas.
+# Produce las mismas jugadas que las clases de Model, que se mantienen como implementación de referencia.
+# Con Board(use_bitboards=True) también se calculan aquí las jugadas legales (jaques y clavadas con rayos
+# desde el rey) y los ataques a una casilla, y make_move actualiza las máscaras con XOR.
+
+PIECE_KEYS = [
+    "pawn_w", "knight_w", "bishop_w", "rook_w", "queen_w", "king_w",
+    "pawn_b", "knight_b", "bishop_b", "rook_b", "queen_b", "king_b",
+]
+
+KNIGHT_DELTAS = [(1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2)]
+KING_DELTAS = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy]
+BISHOP_DIRECTIONS = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
+ROOK_DIRECTIONS = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+
+
+def square_index(pos):
+    # Convierte (col, row) en el índice de bit
+    return pos[1] * 8 + pos[0]
+
+
+def index_to_pos(index):
+    # Convierte un índice de bit en (col, row)
+    return (index & 7, index >> 3)
+
+
+def _step_table(deltas):
+    # Tabla de ataques para piezas que saltan (caballo, rey)
+    table = []
+    for sq in range(64):
+        col, row = index_to_pos(sq)
+        mask = 0
+        for dx, dy in deltas:
+            x, y = col + dx, row + dy
+            if 0 <= x <= 7 and 0 <= y <= 7:
+                mask |= 1 << (y * 8 + x)
+        table.append(mask)
+    return table
+
+
+def _ray_table(dx, dy):
+    # Rayo completo (tablero vacío) desde cada casilla en una dirección
+    table = []
+    for sq in range(64):
+        x, y = index_to_pos(sq)
+        mask = 0
+        while True:
+            x += dx
+            y += dy
+            if not (0 <= x <= 7 and 0 <= y <= 7):
+                break
+            mask |= 1 << (y * 8 + x)
+        table.append(mask)
+    return table
+
+
+KNIGHT_ATTACKS = _step_table(KNIGHT_DELTAS)
+KING_ATTACKS = _step_table(KING_DELTAS)
+# Las blancas avanzan hacia la fila 0, las negras hacia la fila 7
+PAWN_ATTACKS = {
+    "w": _step_table([(-1, -1), (1, -1)]),
+    "b": _step_table([(-1, 1), (1, 1)]),
+}
+# Rayos por dirección; si el índice crece a lo largo del rayo el primer bloqueador es el bit más bajo
+RAYS = {(dx, dy): _ray_table(dx, dy) for dx, dy in BISHOP_DIRECTIONS + ROOK_DIRECTIONS}
+RAY_ASCENDING = {(dx, dy): dy * 8 + dx > 0 for dx, dy in RAYS}
+# Direcciones con las piezas que atacan a lo largo de ellas (sin color): alfil o torre, y la dama
+SLIDER_DIRECTIONS = [(direction, "bishop") for direction in BISHOP_DIRECTIONS] + [
+    (direction, "rook") for direction in ROOK_DIRECTIONS
+]
+SQUARE_POSITIONS = [index_to_pos(sq) for sq in range(64)]
+ALL_SQUARES = (1 << 64) - 1
+OPPONENT = {"w": "b", "b": "w"}
+# Clave de pieza por color y nombre, para no construir cadenas en la generación de jugadas
+KEYS = {color: {key[:-2]: key for key in PIECE_KEYS if key.endswith(color)} for color in "wb"}
+
+
+def first_blocker(direction, blockers):
+    # Índice de la casilla de blockers (no vacío) más cercana al origen del rayo
+    if RAY_ASCENDING[direction]:
+        return (blockers & -blockers).bit_length() - 1
+    return blockers.bit_length() - 1
+
+
+def sliding_attacks(sq, occupied, directions):
+    # Ataques de una pieza deslizante: rayo completo menos lo que queda detrás del primer bloqueador
+    attacks = 0
+    for direction in directions:
+        ray = RAYS[direction][sq]
+        blockers = ray & occupied
+        if blockers:
+            ray ^= RAYS[direction][first_blocker(direction, blockers)]
+        attacks |= ray
+    return attacks
+
+
+def bits_to_positions(bits):
+    # Convierte un bitboard en una lista de casillas (col, row) en orden ascendente
+    positions = []
+    while bits:
+        low = bits & -bits
+        positions.append(index_to_pos(low.bit_length() - 1))
+        bits ^= low
+    return positions
+
+
+class BitboardBoard:
+    def __init__(self, current_positions=None):
+        # Un bitboard por clave de pieza más la ocupación por color
+        self.pieces = {key: 0 for key in PIECE_KEYS}
+        if current_positions:
+            for piece_key, positions in current_positions.items():
+                for pos in positions:
+                    self.pieces[piece_key] |= 1 << square_index(pos)
+        self.update_occupancy()
+
+    def update_occupancy(self):
+        # Recalcula las máscaras de ocupación a partir de los bitboards de piezas
+        white = 0
+        black = 0
+        for piece_key, bits in self.pieces.items():
+            if piece_key.endswith("w"):
+                white |= bits
+            else:
+                black |= bits
+        self.occupied = {"w": white, "b": black}
+        self.all_occupied = white | black
+
+    def copy(self):
+        new_bb = BitboardBoard()
+        new_bb.pieces = dict(self.pieces)
+        new_bb.occupied = dict(self.occupied)
+        new_bb.all_occupied = self.all_occupied
+        return new_bb
+
+    def move_piece(self, piece_key, start_pos, end_pos, captured=None):
+        # Refleja Board.make_move: mueve la pieza y retira captured (la clave de la pieza capturada, que
+        # Board ya conoce). Las máscaras de ocupación se actualizan con XOR de las casillas afectadas.
+        start_bit = 1 << square_index(start_pos)
+        end_bit = 1 << square_index(end_pos)
+        move_bits = start_bit | end_bit
+        self.pieces[piece_key] ^= move_bits
+        self.occupied[piece_key[-1]] ^= move_bits
+        if captured is None:
+            self.all_occupied ^= move_bits
+        else:
+            self.pieces[captured] ^= end_bit
+            self.occupied[captured[-1]] ^= end_bit
+            self.all_occupied ^= start_bit
+
+    def unmove_piece(self, piece_key, start_pos, end_pos, captured):
+        # Refleja Board.unmake_move: devuelve la pieza a su origen y repone la capturada
+        self.move_piece(piece_key, end_pos, start_pos)
+        if captured is not None:
+            end_bit = 1 << square_index(end_pos)
+            self.pieces[captured] ^= end_bit
+            self.occupied[captured[-1]] ^= end_bit
+            self.all_occupied ^= end_bit
+
+    def get_move_bits(self, piece_key, pos):
+        # Devuelve el bitboard de destinos pseudo-legales de la pieza en pos
+        return self.move_bits(piece_key[:-2], piece_key[-1], square_index(pos))
+
+    def move_bits(self, name, color, sq):
+        # Lo mismo con el nombre, el color y el índice de casilla ya separados
+        own = self.occupied[color]
+        if name == "pawn":
+            enemy = self.occupied["b" if color == "w" else "w"]
+            targets = PAWN_ATTACKS[color][sq] & enemy
+            row = sq >> 3
+            step = -8 if color == "w" else 8
+            one = sq + step
+            if 0 <= one < 64 and not (self.all_occupied >> one) & 1:
+                targets |= 1 << one
+                start_row = 6 if color == "w" else 1
+                two = one + step
+                if row == start_row and not (self.all_occupied >> two) & 1:
+                    targets |= 1 << two
+            return targets
+        if name == "knight":
+            return KNIGHT_ATTACKS[sq] & ~own
+        if name == "king":
+            return KING_ATTACKS[sq] & ~own
+        if name == "bishop":
+            directions = BISHOP_DIRECTIONS
+        elif name == "rook":
+            directions = ROOK_DIRECTIONS
+        else:
+            directions = BISHOP_DIRECTIONS + ROOK_DIRECTIONS
+        return sliding_attacks(sq, self.all_occupied, directions) & ~own
+
+    def get_moves(self, piece_key, pos):
+        # Igual que Piece.get_moves pero en orden ascendente de casilla
+        return bits_to_positions(self.get_move_bits(piece_key, pos))
+
+    def is_square_attacked(self, sq, by_color, occupied=None):
+        # Indica si alguna pieza de by_color ataca la casilla sq. occupied permite quitar piezas que no
+        # deben tapar los rayos (el rey que se mueve en legal_moves).
+        pieces = self.pieces
+        keys = KEYS[by_color]
+        if occupied is None:
+            occupied = self.all_occupied
+        if KNIGHT_ATTACKS[sq] & pieces[keys["knight"]] or KING_ATTACKS[sq] & pieces[keys["king"]]:
+            return True
+        # Un peón de by_color en p ataca sq si sq está entre los ataques de p, es decir, si p está
+        # entre los ataques desde sq de un peón del otro color
+        if PAWN_ATTACKS[OPPONENT[by_color]][sq] & pieces[keys["pawn"]]:
+            return True
+        queens = pieces[keys["queen"]]
+        diagonal = pieces[keys["bishop"]] | queens
+        if diagonal and sliding_attacks(sq, occupied, BISHOP_DIRECTIONS) & diagonal:
+            return True
+        straight = pieces[keys["rook"]] | queens
+        return bool(straight and sliding_attacks(sq, occupied, ROOK_DIRECTIONS) & straight)
+
+    def legal_moves(self, color):
+        # Igual que Board.legal_moves pero todo con máscaras: los jaques y las clavadas salen de los
+        # rayos desde el rey y cada pieza filtra sus destinos con un AND
+        pieces = self.pieces
+        keys = KEYS[color]
+        opponent = OPPONENT[color]
+        enemy_keys = KEYS[opponent]
+        own = self.occupied[color]
+        occupied = self.all_occupied
+        king_bit = pieces[keys["king"]]
+        king_sq = king_bit.bit_length() - 1
+
+        check_mask = ALL_SQUARES  # casillas que tapan o capturan al atacante
+        checkers = 0
+        pins = {}  # casilla de la pieza clavada -> máscara de su línea
+        if king_bit:
+            attackers = (KNIGHT_ATTACKS[king_sq] & pieces[enemy_keys["knight"]]) | (
+                PAWN_ATTACKS[color][king_sq] & pieces[enemy_keys["pawn"]]
+            )
+            if attackers:
+                checkers = bin(attackers).count("1")
+                check_mask = attackers
+            queens = pieces[enemy_keys["queen"]]
+            for direction, name in SLIDER_DIRECTIONS:
+                sliders = pieces[enemy_keys[name]] | queens
+                ray = RAYS[direction][king_sq]
+                if not ray & sliders:
+                    continue
+                blockers = ray & occupied
+                first = first_blocker(direction, blockers)
+                first_bit = 1 << first
+                if first_bit & sliders:
+                    checkers += 1
+                    check_mask = ray ^ RAYS[direction][first]
+                elif first_bit & own:
+                    rest = blockers ^ first_bit
+                    if rest:
+                        second = first_blocker(direction, rest)
+                        if (1 << second) & sliders:
+                            pins[first] = ray ^ RAYS[direction][second]
+
+        moves = []
+        # Con jaque doble solo puede moverse el rey
+        if checkers < 2:
+            for name, piece_key in keys.items():
+                if name == "king":
+                    continue
+                bits = pieces[piece_key]
+                while bits:
+                    low = bits & -bits
+                    bits ^= low
+                    sq = low.bit_length() - 1
+                    targets = self.move_bits(name, color, sq) & check_mask
+                    if sq in pins:
+                        targets &= pins[sq]
+                    pos = SQUARE_POSITIONS[sq]
+                    while targets:
+                        target = targets & -targets
+                        targets ^= target
+                        moves.append((piece_key, pos, SQUARE_POSITIONS[target.bit_length() - 1]))
+
+        if king_bit:
+            # Sin el rey en la ocupación, para que no tape los rayos que lo atraviesan
+            without_king = occupied ^ king_bit
+            targets = KING_ATTACKS[king_sq] & ~own
+            king_pos = SQUARE_POSITIONS[king_sq]
+            while targets:
+                target = targets & -targets
+                targets ^= target
+                sq = target.bit_length() - 1
+                if not self.is_square_attacked(sq, opponent, without_king):
+                    moves.append((keys["king"], king_pos, SQUARE_POSITIONS[sq]))
+        return moves
+
+
+# Adaptador con la misma interfaz que las piezas de Model (get_moves(pos, board, simulate))
+class BitboardPiece:
+    def __init__(self, name, color):
+        self.name = name
+        self.color = color
+        self.key = f"{name}_{color}"
+
+    def get_moves(self, pos, board, simulate=False):
+        return board.bitboards.get_moves(self.key, pos)
+
+
+def cross_check(board):
+    # Compara las jugadas del motor de bitboards con las clases de referencia de Model.
+    # Devuelve una lista de (pieza, casilla, jugadas_referencia, jugadas_bitboard) que no coinciden.
+    import Model  # import local: Model importa este módulo
+
+    bitboards = BitboardBoard(board.current_positions)
+    mismatches = []
+    for piece_key, positions in board.current_positions.items():
+        name, color = piece_key.split("_")
+        reference = Model.PIECE_CLASSES[name](name, color)
+        for pos in positions:
+            expected = sorted(reference.get_moves(pos, board))
+            got = sorted(bitboards.get_moves(piece_key, pos))
+            if expected != got:
+                mismatches.append((piece_key, pos, expected, got))
+    return mismatches
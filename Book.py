@@ -0,0 +1,178 @@
+# Libro de aperturas con el formato de fichero de Polyglot: entradas de 16 bytes big-endian
+# (clave u64, jugada u16, peso u16, aprendizaje u32) ordenadas por clave. La clave es Board.hash.
+# El fichero se consulta con mmap y búsqueda binaria, sin cargarlo en objetos de Python, así que abrir
+# un libro de cientos de MB es instantáneo y casi no ocupa memoria. Uso:
+#   python Book.py build partidas.pgn libro.bin --plies 20
+#   python Book.py probe libro.bin --fen "..."
+import argparse
+import mmap
+import os
+import random
+import struct
+
+import Model as m
+import Pgn
+
+ENTRY = struct.Struct(">QHHI")
+KEY = struct.Struct(">Q")
+ENTRY_SIZE = ENTRY.size  # 16 bytes
+MAX_WEIGHT = 0xFFFF
+# Peso de una jugada según el resultado de la partida para el bando que la juega
+RESULT_WEIGHTS = {"win": 2, "draw": 1, "loss": 0, "unknown": 1}
+
+
+def encode_move(start, end):
+    # Jugada en el formato de Polyglot: columna y fila (fila 0 = primera fila) de destino y de origen
+    return end[0] | (7 - end[1]) << 3 | start[0] << 6 | (7 - start[1]) << 9
+
+
+def decode_move(value):
+    # Devuelve (origen, destino) en coordenadas (col, row) del modelo
+    end = (value & 7, 7 - ((value >> 3) & 7))
+    start = ((value >> 6) & 7, 7 - ((value >> 9) & 7))
+    return start, end
+
+
+def _result_for(result, color):
+    if result == "1/2-1/2":
+        return "draw"
+    if result not in ("1-0", "0-1"):
+        return "unknown"
+    return "win" if (result == "1-0") == (color == "w") else "loss"
+
+
+def build_book(pgn_paths, out_path, max_plies=20, min_games=1):
+    # Crea el libro con las jugadas de las max_plies primeras medias jugadas de cada partida. Los pesos
+    # suman 2 por victoria y 1 por tablas; se descartan las jugadas vistas en menos de min_games partidas.
+    # Una partida con una jugada no válida se usa solo hasta esa jugada. Devuelve el número de entradas.
+    weights = {}
+    counts = {}
+    for path in pgn_paths:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for game in Pgn.read_games(f):
+                try:
+                    board = game.board()
+                    for san in game.moves[:max_plies]:
+                        move = Pgn.san_to_move(board, san)
+                        entry = (board.hash, encode_move(move[1], move[2]))
+                        weights[entry] = weights.get(entry, 0) + RESULT_WEIGHTS[_result_for(game.result, board.turn)]
+                        counts[entry] = counts.get(entry, 0) + 1
+                        board.make_move(*move)
+                except ValueError:
+                    continue
+
+    # Si alguna posición tiene pesos por encima de 16 bits se escalan todos los de esa posición
+    by_key = {}
+    for (key, move), weight in weights.items():
+        if counts[(key, move)] >= min_games:
+            by_key.setdefault(key, []).append((move, weight))
+    entries = []
+    for key, moves in by_key.items():
+        top = max(weight for _, weight in moves)
+        scale = MAX_WEIGHT / top if top > MAX_WEIGHT else 1
+        for move, weight in moves:
+            weight = int(weight * scale)
+            if weight > 0:
+                entries.append((key, move, weight))
+    # Orden de Polyglot: por clave y, dentro de cada posición, de mayor a menor peso
+    entries.sort(key=lambda entry: (entry[0], -entry[2]))
+    with open(out_path, "wb") as out:
+        for key, move, weight in entries:
+            out.write(ENTRY.pack(key, move, weight, 0))
+    return len(entries)
+
+
+class OpeningBook:
+    def __init__(self, path, seed=None):
+        self.path = path
+        self.rng = random.Random(seed)
+        self.file = open(path, "rb")
+        size = os.fstat(self.file.fileno()).st_size
+        self.count = size // ENTRY_SIZE
+        # mmap no admite ficheros vacíos
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if self.count else b""
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.file.close()
+
+    def key_at(self, index):
+        return KEY.unpack_from(self.data, index * ENTRY_SIZE)[0]
+
+    def find(self, key):
+        # Índice de la primera entrada con clave >= key (búsqueda binaria sobre el fichero)
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            if self.key_at(mid) < key:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def entries(self, key):
+        # [(origen, destino, peso)] guardados para la clave
+        result = []
+        index = self.find(key)
+        while index < self.count:
+            entry_key, move, weight, _ = ENTRY.unpack_from(self.data, index * ENTRY_SIZE)
+            if entry_key != key:
+                break
+            start, end = decode_move(move)
+            result.append((start, end, weight))
+            index += 1
+        return result
+
+    def moves(self, board):
+        # Jugadas del libro para board como [((pieza, origen, destino), peso)], solo las legales
+        # (una colisión de hash no puede devolver una jugada imposible)
+        found = self.entries(board.hash)
+        if not found:
+            return []
+        legal = set(board.legal_moves(board.turn))
+        result = []
+        for start, end, weight in found:
+            move = (board.piece_at(start), start, end)
+            if move in legal:
+                result.append((move, weight))
+        return result
+
+    def choose(self, board, best=False):
+        # Jugada del libro para board (al azar según los pesos, o la de más peso) o None
+        moves = self.moves(board)
+        if not moves:
+            return None
+        if best:
+            return max(moves, key=lambda item: item[1])[0]
+        return self.rng.choices([move for move, _ in moves], weights=[weight for _, weight in moves])[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Libro de aperturas en formato Polyglot")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="crea un libro a partir de ficheros PGN")
+    build.add_argument("pgn", nargs="+")
+    build.add_argument("output")
+    build.add_argument("--plies", type=int, default=20, help="medias jugadas de cada partida que entran en el libro")
+    build.add_argument("--min-games", type=int, default=1)
+    probe = commands.add_parser("probe", help="muestra las jugadas del libro para una posición")
+    probe.add_argument("book")
+    probe.add_argument("--fen", default=m.START_FEN)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        count = build_book(args.pgn, args.output, args.plies, args.min_games)
+        print(f"{count} entries written to {args.output}")
+    else:
+        book = OpeningBook(args.book)
+        board = m.Board.from_fen(args.fen)
+        moves = book.moves(board)
+        total = sum(weight for _, weight in moves) or 1
+        for move, weight in sorted(moves, key=lambda item: -item[1]):
+            print(f"{Pgn.move_to_san(board, move):8} weight {weight:6}  {100 * weight / total:5.1f}%")
+        book.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,474 @@
+# Motor de búsqueda para jugar contra el ordenador o analizar posiciones. Negamax con poda alfa-beta,
+# profundización iterativa, búsqueda de quietud y ordenación de jugadas (MVV-LVA, killers, historial).
+# Trabaja directamente sobre Model.Board con make_move/unmake_move y no usa interfaz gráfica.
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import Book
+import Tablebase
+import Transposition as tt
+
+# Valores para ordenar capturas (MVV-LVA); la evaluación está en Evaluation.py
+PIECE_VALUES = {
+    "pawn": 100,
+    "knight": 320,
+    "bishop": 330,
+    "rook": 500,
+    "queen": 900,
+    "king": 20000,
+}
+
+MATE_SCORE = 100000
+INFINITY = 1000000
+MAX_PLY = 64
+# Cada cuántos nodos se consulta el reloj
+CHECK_INTERVAL = 1024
+
+
+def evaluate(board):
+    # Evaluación desde el punto de vista del bando que mueve: material y casillas, que el tablero
+    # mantiene al hacer y deshacer jugadas (Evaluation.py)
+    return board.eval()
+
+
+def is_mate_score(score):
+    # Los mates de las tablas de finales pueden estar hasta Tablebase.LOSS medias jugadas más allá del horizonte
+    return abs(score) >= MATE_SCORE - MAX_PLY - Tablebase.LOSS
+
+
+def score_to_tt(score, ply):
+    # Las puntuaciones de mate se guardan relativas al nodo, no a la raíz
+    if is_mate_score(score):
+        return score + ply if score > 0 else score - ply
+    return score
+
+
+def score_from_tt(score, ply):
+    if is_mate_score(score):
+        return score - ply if score > 0 else score + ply
+    return score
+
+
+class SearchResult:
+    def __init__(self, move, pv, score, depth, nodes, elapsed):
+        self.move = move  # Mejor jugada (pieza, origen, destino) o None si no hay jugadas
+        self.pv = pv  # Variante principal
+        self.score = score  # Puntuación en centipeones desde el punto de vista del bando que mueve
+        self.depth = depth  # Última profundidad completada
+        self.nodes = nodes  # Nodos visitados
+        self.elapsed = elapsed  # Segundos empleados
+
+    def __repr__(self):
+        return (f"SearchResult(move={self.move}, score={self.score}, depth={self.depth}, "
+                f"nodes={self.nodes}, elapsed={self.elapsed:.3f})")
+
+
+class Engine:
+    def __init__(self, max_depth=MAX_PLY, time_limit=None, node_limit=None, hash_mb=16, table=None, threads=1,
+                 book=None, tablebase=None):
+        # time_limit en segundos y node_limit en nodos; la búsqueda se corta al agotar cualquiera.
+        # La tabla de transposición (hash_mb megabytes) se conserva entre búsquedas.
+        # Con threads > 1 se busca en paralelo en un grupo de procesos que comparten la tabla.
+        # book es un Book.OpeningBook (o la ruta de uno) que se consulta antes de buscar.
+        # tablebase es un Tablebase.Tablebase (o su directorio) que puntúa los finales de tres piezas.
+        if isinstance(book, str):
+            book = Book.OpeningBook(book)
+        self.book = book
+        if isinstance(tablebase, str):
+            tablebase = Tablebase.Tablebase(tablebase)
+        self.tablebase = tablebase
+        self.threads = max(1, threads)
+        self.hash_mb = hash_mb
+        if table is None:
+            buffer = tt.shared_buffer(hash_mb) if self.threads > 1 else None
+            table = tt.TranspositionTable(hash_mb, buffer=buffer)
+        self.table = table
+        self.pool = None
+        # Función opcional que devuelve True cuando hay que abandonar la búsqueda (cancelación externa)
+        self.stop_check = None
+        self.max_depth = max_depth
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.board = None
+        self.nodes = 0
+        self.stopped = False
+        self.deadline = None
+        self.nodes_budget = node_limit
+        self.next_check = CHECK_INTERVAL
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        self.history = {}
+        self.pv_table = [[None] * MAX_PLY for _ in range(MAX_PLY)]
+        self.pv_length = [0] * MAX_PLY
+        self.previous_pv = []
+
+    def close(self):
+        # Libera el grupo de procesos de la búsqueda paralela, el libro y las tablas de finales
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+        if self.book is not None:
+            self.book.close()
+            self.book = None
+        if self.tablebase is not None:
+            self.tablebase.close()
+            self.tablebase = None
+
+    def search(self, board, color=None, max_depth=None, time_limit=None, node_limit=None):
+        # Busca la mejor jugada para color (por defecto board.turn). El tablero queda como estaba.
+        if color is not None and color != board.turn:
+            board = board.copy()
+            board.turn = color
+            board.ep_square = None
+            board.hash = board.compute_hash()
+        if self.book is not None:
+            start = time.perf_counter()
+            move = self.book.choose(board)
+            if move is not None:
+                return SearchResult(move, [move], 0, 0, 0, time.perf_counter() - start)
+        max_depth = min(max_depth or self.max_depth, MAX_PLY - 1)
+        time_limit = time_limit if time_limit is not None else self.time_limit
+        node_limit = node_limit if node_limit is not None else self.node_limit
+
+        self.table.new_search()
+        if self.threads > 1:
+            return self.parallel_search(board, max_depth, time_limit, node_limit)
+        return self.iterative_deepening(board, max_depth, time_limit, node_limit)
+
+    def parallel_search(self, board, max_depth, time_limit, node_limit):
+        # Lazy SMP: cada proceso hace su propia profundización iterativa sobre la misma posición y
+        # comparten lo aprendido a través de la tabla de transposición. Los procesos impares empiezan
+        # una profundidad más adelante para que no recorran el árbol al mismo paso.
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.threads,
+                initializer=_init_worker,
+                initargs=(self.table.buffer, self.hash_mb,
+                          self.tablebase.directory if self.tablebase is not None else None),
+            )
+        start = time.perf_counter()
+        budget = max(1, node_limit // self.threads) if node_limit else None
+        futures = [
+            self.pool.submit(
+                _worker_search, board, max_depth, time_limit, budget, self.table.generation, 1 + worker % 2
+            )
+            for worker in range(self.threads)
+        ]
+        results = [future.result() for future in futures]
+        # Se queda con el resultado más profundo (a igualdad, el del primer proceso)
+        best = max(results, key=lambda result: result.depth)
+        best.nodes = sum(result.nodes for result in results)
+        best.elapsed = time.perf_counter() - start
+        return best
+
+    def iterative_deepening(self, board, max_depth, time_limit, node_limit, start_depth=1):
+        self.board = board
+        self.nodes = 0
+        self.stopped = False
+        self.nodes_budget = node_limit
+        start = time.perf_counter()
+        self.deadline = start + time_limit if time_limit else None
+        self.check_limits()
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        self.history = {}
+        self.previous_pv = []
+
+        root_moves = board.legal_moves(board.turn)
+        if not root_moves:
+            score = -MATE_SCORE if board.is_king_in_check(board.turn) else 0
+            return SearchResult(None, [], score, 0, 0, time.perf_counter() - start)
+
+        result = SearchResult(root_moves[0], [root_moves[0]], 0, 0, 0, 0.0)
+        for depth in range(min(start_depth, max_depth), max_depth + 1):
+            score = self.negamax(depth, -INFINITY, INFINITY, 0)
+            if self.stopped:
+                break
+            pv = self.pv_table[0][:self.pv_length[0]]
+            self.previous_pv = pv
+            result = SearchResult(pv[0] if pv else root_moves[0], pv, score, depth, self.nodes, 0.0)
+            # Mate encontrado o jugada única: no hace falta seguir profundizando
+            if is_mate_score(score) or len(root_moves) == 1:
+                break
+            # Si ya se ha gastado la mitad del tiempo, la siguiente iteración no llegaría a terminar
+            if self.deadline and time.perf_counter() - start > time_limit / 2:
+                break
+
+        result.nodes = self.nodes
+        result.elapsed = time.perf_counter() - start
+        return result
+
+    def check_limits(self):
+        # Marca la búsqueda como detenida si se agotó el tiempo o el presupuesto de nodos
+        # y programa la siguiente comprobación
+        if self.nodes_budget is not None and self.nodes >= self.nodes_budget:
+            self.stopped = True
+        elif self.deadline is not None and time.perf_counter() >= self.deadline:
+            self.stopped = True
+        elif self.stop_check is not None and self.stop_check():
+            self.stopped = True
+        self.next_check = self.nodes + CHECK_INTERVAL
+        if self.nodes_budget is not None:
+            self.next_check = min(self.next_check, self.nodes_budget)
+
+    def negamax(self, depth, alpha, beta, ply):
+        self.nodes += 1
+        if self.nodes >= self.next_check:
+            self.check_limits()
+        if self.stopped:
+            return 0
+        self.pv_length[ply] = ply
+
+        board = self.board
+        if depth <= 0 or ply >= MAX_PLY - 1:
+            return self.quiescence(alpha, beta, ply)
+
+        # Fuera de la raíz, las posiciones de las tablas de finales tienen puntuación exacta
+        if ply > 0 and self.tablebase is not None:
+            tb_score = self.probe_tablebase(ply)
+            if tb_score is not None:
+                return tb_score
+
+        # En la raíz no se corta con la tabla para tener siempre variante principal
+        key = board.hash
+        hash_move = None
+        entry = self.table.probe(key)
+        if entry is not None:
+            entry_depth, entry_score, bound, hash_move = entry
+            if ply > 0 and entry_depth >= depth:
+                entry_score = score_from_tt(entry_score, ply)
+                if (
+                    bound == tt.EXACT
+                    or (bound == tt.LOWER and entry_score >= beta)
+                    or (bound == tt.UPPER and entry_score <= alpha)
+                ):
+                    return entry_score
+
+        color = board.turn
+        moves = board.legal_moves(color)
+        if not moves:
+            # Jaque mate (se prefiere el más corto) o ahogado
+            return -MATE_SCORE + ply if board.is_king_in_check(color) else 0
+
+        alpha_start = alpha
+        best_score = -INFINITY
+        best_move = None
+        for move in self.order_moves(moves, ply, hash_move):
+            captured = board.make_move(*move)
+            score = -self.negamax(depth - 1, -beta, -alpha, ply + 1)
+            board.unmake_move()
+            if self.stopped:
+                return 0
+
+            if score > best_score:
+                best_score = score
+                best_move = move
+            if score > alpha:
+                alpha = score
+                self.update_pv(move, ply)
+                if score >= beta:
+                    if captured is None:
+                        self.store_killer(move, ply)
+                        history_key = (move[0], move[2])
+                        self.history[history_key] = self.history.get(history_key, 0) + depth * depth
+                    break
+
+        if best_score >= beta:
+            bound = tt.LOWER
+        elif best_score > alpha_start:
+            bound = tt.EXACT
+        else:
+            bound = tt.UPPER
+        start, end = best_move[1], best_move[2]
+        move_squares = (start[1] * 8 + start[0], end[1] * 8 + end[0])
+        self.table.store(key, depth, score_to_tt(best_score, ply), bound, move_squares)
+        return best_score
+
+    def probe_tablebase(self, ply):
+        # Puntuación de mate de la tabla (la misma escala que negamax) o None si no está en las tablas
+        result = self.tablebase.probe(self.board)
+        if result is None:
+            return None
+        outcome, plies = result
+        if outcome == "win":
+            return MATE_SCORE - ply - plies
+        if outcome == "loss":
+            return -MATE_SCORE + ply + plies
+        return 0
+
+    def quiescence(self, alpha, beta, ply):
+        # Solo se exploran capturas hasta llegar a una posición tranquila
+        self.nodes += 1
+        if self.nodes >= self.next_check:
+            self.check_limits()
+        if self.stopped:
+            return 0
+        self.pv_length[ply] = ply
+
+        board = self.board
+        stand_pat = evaluate(board)
+        if stand_pat >= beta or ply >= MAX_PLY - 1:
+            return stand_pat
+        if stand_pat > alpha:
+            alpha = stand_pat
+
+        squares = board.squares
+        captures = [
+            move for move in board.legal_moves(board.turn)
+            if squares[move[2][1] * 8 + move[2][0]] is not None
+        ]
+        captures.sort(key=lambda move: self.mvv_lva(move), reverse=True)
+        for move in captures:
+            board.make_move(*move)
+            score = -self.quiescence(-beta, -alpha, ply + 1)
+            board.unmake_move()
+            if self.stopped:
+                return 0
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+        return alpha
+
+    def mvv_lva(self, move):
+        # Víctima más valiosa, atacante menos valioso
+        victim = self.board.piece_at(move[2])
+        if victim is None:
+            return 0
+        return PIECE_VALUES[victim.split("_")[0]] * 10 - PIECE_VALUES[move[0].split("_")[0]] // 10
+
+    def order_moves(self, moves, ply, hash_move=None):
+        # Primero la jugada de la tabla de transposición y la de la variante principal anterior,
+        # luego capturas (MVV-LVA), killers de este ply y por último el resto según el historial
+        pv_move = self.previous_pv[ply] if ply < len(self.previous_pv) else None
+        killers = self.killers[ply]
+        history = self.history
+        squares = self.board.squares
+
+        def score(move):
+            start, end = move[1], move[2]
+            if hash_move is not None and hash_move == (start[1] * 8 + start[0], end[1] * 8 + end[0]):
+                return 20000000
+            if move == pv_move:
+                return 10000000
+            if squares[end[1] * 8 + end[0]] is not None:
+                return 1000000 + self.mvv_lva(move)
+            if move == killers[0]:
+                return 900000
+            if move == killers[1]:
+                return 800000
+            return history.get((move[0], end), 0)
+
+        return sorted(moves, key=score, reverse=True)
+
+    def store_killer(self, move, ply):
+        killers = self.killers[ply]
+        if move != killers[0]:
+            killers[1] = killers[0]
+            killers[0] = move
+
+    def update_pv(self, move, ply):
+        # Variante principal triangular: la jugada de este ply seguida de la del ply siguiente
+        row = self.pv_table[ply]
+        row[ply] = move
+        child = self.pv_table[ply + 1]
+        length = self.pv_length[ply + 1]
+        for i in range(ply + 1, length):
+            row[i] = child[i]
+        self.pv_length[ply] = max(length, ply + 1)
+
+
+# Motor de cada proceso de la búsqueda paralela, conectado a la tabla compartida
+_worker_engine = None
+
+
+def _init_worker(buffer, hash_mb, tablebase_dir):
+    global _worker_engine
+    _worker_engine = Engine(table=tt.TranspositionTable(hash_mb, buffer=buffer), tablebase=tablebase_dir)
+
+
+def _worker_search(board, max_depth, time_limit, node_limit, generation, start_depth):
+    _worker_engine.table.generation = generation
+    return _worker_engine.iterative_deepening(board, max_depth, time_limit, node_limit, start_depth)
+
+
+class EngineController:
+    # Ejecuta el motor en un proceso aparte para que el bucle de pygame no se detenga mientras piensa.
+    # El presentador llama a start() con la posición, sigue dibujando y consulta poll() en cada fotograma.
+    def __init__(self, time_limit=1.0, max_depth=None, hash_mb=16, ponder=False, book_path=None,
+                 tablebase_dir=None):
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.ponder_enabled = ponder
+        # Identificador de la búsqueda vigente: al cambiarlo, la búsqueda en curso se abandona
+        self.search_id = multiprocessing.Value("i", 0)
+        self.pool = ProcessPoolExecutor(
+            max_workers=1,
+            initializer=_init_controller_worker,
+            initargs=(self.search_id, hash_mb, book_path, tablebase_dir),
+        )
+        self.future = None
+        self.pondering = False
+
+    def next_search_id(self):
+        with self.search_id.get_lock():
+            self.search_id.value += 1
+            return self.search_id.value
+
+    def start(self, board):
+        # Lanza la búsqueda de la mejor jugada para board.turn; cancela lo que hubiera en curso.
+        # Se envía una copia porque el tablero se serializa más tarde, en otro hilo.
+        search_id = self.next_search_id()
+        self.pondering = False
+        self.future = self.pool.submit(
+            _controller_search, board.copy(), search_id, self.max_depth, self.time_limit
+        )
+
+    def ponder(self, board, expected_move):
+        # Piensa durante el turno del rival sobre la posición tras la respuesta esperada. El resultado
+        # no se usa: sirve para llenar la tabla de transposición del proceso, que la siguiente
+        # búsqueda aprovecha. Cualquier start() o cancel() lo interrumpe.
+        if not self.ponder_enabled or expected_move is None:
+            return
+        ponder_board = board.copy()
+        ponder_board.make_move(*expected_move)
+        search_id = self.next_search_id()
+        self.pondering = True
+        self.future = self.pool.submit(_controller_search, ponder_board, search_id, self.max_depth, None)
+
+    def poll(self):
+        # Devuelve el SearchResult si la búsqueda terminó, o None si sigue pensando (o está meditando)
+        if self.future is None or self.pondering or not self.future.done():
+            return None
+        result = self.future.result()
+        self.future = None
+        return result
+
+    def is_thinking(self):
+        return self.future is not None and not self.pondering
+
+    def cancel(self):
+        # Abandona la búsqueda o la meditación en curso; su resultado se descarta
+        self.next_search_id()
+        self.future = None
+        self.pondering = False
+
+    def close(self):
+        self.cancel()
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+
+# Motor persistente del proceso del controlador (conserva su tabla entre búsquedas)
+_controller_engine = None
+_controller_search_id = None
+
+
+def _init_controller_worker(search_id, hash_mb, book_path, tablebase_dir):
+    global _controller_engine, _controller_search_id
+    # El libro y las tablas se abren en el propio proceso (un mmap no se puede enviar entre procesos)
+    _controller_engine = Engine(hash_mb=hash_mb, book=book_path, tablebase=tablebase_dir)
+    _controller_search_id = search_id
+
+
+def _controller_search(board, search_id, max_depth, time_limit):
+    _controller_engine.stop_check = lambda: _controller_search_id.value != search_id
+    return _controller_engine.search(board, max_depth=max_depth, time_limit=time_limit)
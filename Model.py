@@ -1,7 +1,99 @@
-
 # Contiene la lógica del tablero y las piezas. No usa interfaz gráfica.
+import random
+
+import Bitboard
+import Evaluation
+
+# Tablas precalculadas por casilla (índice fila * 8 + columna) para detectar ataques mirando
+# hacia fuera desde la casilla objetivo.
+KNIGHT_DELTAS = [(1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2)]
+KING_DELTAS = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy]
+DIAGONAL_DIRECTIONS = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
+STRAIGHT_DIRECTIONS = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+
+
+def _neighbour_table(deltas):
+    # Para cada casilla, índices de las casillas alcanzables con un salto de deltas
+    table = []
+    for sq in range(64):
+        col, row = sq % 8, sq // 8
+        table.append([
+            (row + dy) * 8 + col + dx
+            for dx, dy in deltas
+            if 0 <= col + dx <= 7 and 0 <= row + dy <= 7
+        ])
+    return table
+
+
+def _ray_table():
+    # Para cada casilla, lista de (es_diagonal, índices del rayo ordenados desde la casilla hacia fuera)
+    table = []
+    for sq in range(64):
+        rays = []
+        for diagonal, directions in ((True, DIAGONAL_DIRECTIONS), (False, STRAIGHT_DIRECTIONS)):
+            for dx, dy in directions:
+                x, y = sq % 8 + dx, sq // 8 + dy
+                ray = []
+                while 0 <= x <= 7 and 0 <= y <= 7:
+                    ray.append(y * 8 + x)
+                    x += dx
+                    y += dy
+                if ray:
+                    rays.append((diagonal, ray))
+        table.append(rays)
+    return table
+
+
+KNIGHT_TABLE = _neighbour_table(KNIGHT_DELTAS)
+KING_TABLE = _neighbour_table(KING_DELTAS)
+# Casillas desde las que un peón del color indicado ataca la casilla: las blancas capturan hacia
+# la fila anterior, así que el atacante blanco está una fila por debajo (row + 1)
+PAWN_ATTACKER_TABLE = {
+    "w": _neighbour_table([(-1, 1), (1, 1)]),
+    "b": _neighbour_table([(-1, -1), (1, -1)]),
+}
+RAY_TABLE = _ray_table()
+
+# Claves Zobrist de 64 bits (semilla fija para que el hash sea estable entre ejecuciones y procesos)
+_zobrist_random = random.Random(20240601)
+ZOBRIST_PIECES = {key: [_zobrist_random.getrandbits(64) for _ in range(64)] for key in Bitboard.PIECE_KEYS}
+ZOBRIST_BLACK_TO_MOVE = _zobrist_random.getrandbits(64)
+ZOBRIST_CASTLING_RIGHTS = [_zobrist_random.getrandbits(64) for _ in range(4)]
+ZOBRIST_EP_FILE = [_zobrist_random.getrandbits(64) for _ in range(8)]
+
+# Derechos de enroque como máscara de bits (el modelo no juega enroques, pero los conserva para FEN y el hash)
+CASTLE_WHITE_KING = 1
+CASTLE_WHITE_QUEEN = 2
+CASTLE_BLACK_KING = 4
+CASTLE_BLACK_QUEEN = 8
+CASTLE_ALL = 15
+CASTLING_LETTERS = [(CASTLE_WHITE_KING, "K"), (CASTLE_WHITE_QUEEN, "Q"), (CASTLE_BLACK_KING, "k"), (CASTLE_BLACK_QUEEN, "q")]
+# Hash de cada combinación de derechos
+ZOBRIST_CASTLING = [0] * 16
+for _mask in range(16):
+    for _i in range(4):
+        if _mask & (1 << _i):
+            ZOBRIST_CASTLING[_mask] ^= ZOBRIST_CASTLING_RIGHTS[_i]
+# Derechos que sobreviven a que una pieza salga de (o llegue a) cada casilla: mover el rey o una torre,
+# o capturar una torre en su casilla inicial, los pierde
+CASTLING_MASK = [CASTLE_ALL] * 64
+CASTLING_MASK[4] = CASTLE_ALL & ~(CASTLE_BLACK_KING | CASTLE_BLACK_QUEEN)  # e8
+CASTLING_MASK[0] = CASTLE_ALL & ~CASTLE_BLACK_QUEEN  # a8
+CASTLING_MASK[7] = CASTLE_ALL & ~CASTLE_BLACK_KING  # h8
+CASTLING_MASK[60] = CASTLE_ALL & ~(CASTLE_WHITE_KING | CASTLE_WHITE_QUEEN)  # e1
+CASTLING_MASK[56] = CASTLE_ALL & ~CASTLE_WHITE_QUEEN  # a1
+CASTLING_MASK[63] = CASTLE_ALL & ~CASTLE_WHITE_KING  # h1
+
+FEN_PIECES = {
+    "P": "pawn_w", "N": "knight_w", "B": "bishop_w", "R": "rook_w", "Q": "queen_w", "K": "king_w",
+    "p": "pawn_b", "n": "knight_b", "b": "bishop_b", "r": "rook_b", "q": "queen_b", "k": "king_b",
+}
+FEN_LETTERS = {key: letter for letter, key in FEN_PIECES.items()}
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+
 class Board:
-    def __init__(self):
+    def __init__(self, use_bitboards=False):
         # Define las posiciones iniciales de cada pieza
         self.initial_positions = {
             "rook_b": [(0, 0), (7, 0)],
@@ -18,29 +110,208 @@ class Board:
             "pawn_w": [(i, 6) for i in range(8)],
         }
         self.current_positions = {k: list(v) for k, v in self.initial_positions.items()}
+        # Índice de casillas: 64 entradas (fila * 8 + columna) con la clave de la pieza o None.
+        # Se mantiene sincronizado con current_positions para consultas en O(1).
+        self.squares = [None] * 64
+        self.rebuild_squares()
+        # Motor opcional de bitboards; si está activo, legal_moves, is_square_attacked y las piezas de
+        # get_piece_object lo usan en lugar del índice de casillas
+        self.bitboards = Bitboard.BitboardBoard(self.current_positions) if use_bitboards else None
+        # Turno actual ('w' o 'b') y hash Zobrist de la posición, actualizado en cada jugada
+        self.turn = "w"
+        # Estado que no está en las piezas: derechos de enroque, casilla de captura al paso y relojes
+        self.castling = CASTLE_ALL
+        self.ep_square = None
+        self.halfmove_clock = 0
+        self.fullmove_number = 1
+        self.hash = self.compute_hash()
+        # Sumas de la evaluación (blancas menos negras) y fase de la partida, actualizadas en cada jugada
+        self.eval_mg, self.eval_eg, self.phase = Evaluation.compute_terms(self.current_positions)
+        # Pila de registros de deshacer de make_move
+        self.move_stack = []
         self.game_over = False
         self.winner = None
 
+    @classmethod
+    def from_fen(cls, fen, use_bitboards=False):
+        # Crea un tablero directamente desde una cadena FEN, sin pasar por la posición inicial
+        board = cls.__new__(cls)
+        board.bitboards = None
+        positions, turn, castling, ep_square, halfmove_clock, fullmove_number = parse_fen(fen)
+        board.initial_positions = positions
+        board.set_position(positions, turn, castling, ep_square, halfmove_clock, fullmove_number)
+        if use_bitboards:
+            board.bitboards = Bitboard.BitboardBoard(board.current_positions)
+        return board
+
+    def to_fen(self):
+        # Devuelve la posición en notación FEN
+        rows = []
+        for row in range(8):
+            text = ""
+            empty = 0
+            for piece_key in self.squares[row * 8:row * 8 + 8]:
+                if piece_key is None:
+                    empty += 1
+                    continue
+                if empty:
+                    text += str(empty)
+                    empty = 0
+                text += FEN_LETTERS[piece_key]
+            if empty:
+                text += str(empty)
+            rows.append(text)
+        castling = "".join(letter for bit, letter in CASTLING_LETTERS if self.castling & bit) or "-"
+        ep = pos_to_notation(self.ep_square) if self.ep_square is not None else "-"
+        return f"{'/'.join(rows)} {self.turn} {castling} {ep} {self.halfmove_clock} {self.fullmove_number}"
+
+    def set_position(self, positions, turn="w", castling=0, ep_square=None, halfmove_clock=0, fullmove_number=1):
+        # Coloca una posición arbitraria {clave_pieza: [(col, row), ...]} y reinicia el estado derivado
+        self.current_positions = {key: list(positions.get(key, [])) for key in Bitboard.PIECE_KEYS}
+        self.rebuild_squares()
+        if self.bitboards is not None:
+            self.bitboards = Bitboard.BitboardBoard(self.current_positions)
+        self.turn = turn
+        self.castling = castling
+        self.ep_square = ep_square
+        self.halfmove_clock = halfmove_clock
+        self.fullmove_number = fullmove_number
+        self.hash = self.compute_hash()
+        self.eval_mg, self.eval_eg, self.phase = Evaluation.compute_terms(self.current_positions)
+        self.move_stack = []
+        self.game_over = False
+        self.winner = None
+
+    def rebuild_squares(self):
+        # Reconstruye el índice de casillas a partir de las listas de piezas
+        self.squares = [None] * 64
+        for piece_key, positions in self.current_positions.items():
+            for col, row in positions:
+                self.squares[row * 8 + col] = piece_key
+
+    def compute_hash(self):
+        # Calcula el hash Zobrist desde cero (para inicializar y para comprobar el incremental)
+        h = ZOBRIST_BLACK_TO_MOVE if self.turn == "b" else 0
+        for piece_key, positions in self.current_positions.items():
+            keys = ZOBRIST_PIECES[piece_key]
+            for col, row in positions:
+                h ^= keys[row * 8 + col]
+        return h ^ ZOBRIST_CASTLING[self.castling] ^ self.ep_hash()
+
+    def eval(self):
+        # Evaluación estática en O(1) desde el punto de vista del bando que mueve (ver Evaluation.py)
+        return Evaluation.tapered(self.eval_mg, self.eval_eg, self.phase, self.turn)
+
+    def ep_hash(self):
+        # La casilla al paso solo entra en el hash si un peón del bando que mueve podría capturar
+        # (como en Polyglot); si no, la posición es la misma a efectos de repetición
+        if self.ep_square is None:
+            return 0
+        col, row = self.ep_square
+        pawn_row = row - 1 if self.turn == "b" else row + 1
+        pawn = f"pawn_{self.turn}"
+        for c in (col - 1, col + 1):
+            if 0 <= c <= 7 and self.squares[pawn_row * 8 + c] == pawn:
+                return ZOBRIST_EP_FILE[col]
+        return 0
+
+    def piece_at(self, pos):
+        # Devuelve la clave de la pieza en la casilla (col, row) o None si está vacía
+        return self.squares[pos[1] * 8 + pos[0]]
+
     def move_piece(self, piece_key, start_pos, end_pos, simulate=False):
-        # Mueve una pieza y actualiza las posiciones.
-        if start_pos in self.current_positions[piece_key]:
-            self.current_positions[piece_key].remove(start_pos)
-
-        # Ver si se captura alguna pieza
-        for p, positions in self.current_positions.items():
-            if end_pos in positions:
-                if not simulate:
-                    positions.remove(end_pos)
-                    # Si se comió al rey
-                    if p.startswith("king"):
-                        self.game_over = True
-                        self.winner = "white" if p.endswith("b") else "black"
-                else:
-                    positions.remove(end_pos)
-                break
+        # Mueve una pieza y actualiza las posiciones. Con simulate no se declara el fin de la partida.
+        captured = self.make_move(piece_key, start_pos, end_pos)
+        # Si se comió al rey
+        if not simulate and captured is not None and captured.startswith("king"):
+            self.game_over = True
+            self.winner = "white" if captured.endswith("b") else "black"
+
+    def make_move(self, piece_key, start_pos, end_pos):
+        # Aplica una jugada en el sitio y apila un registro para deshacerla con unmake_move.
+        # Devuelve la clave de la pieza capturada o None.
+        start_index = start_pos[1] * 8 + start_pos[0]
+        end_index = end_pos[1] * 8 + end_pos[0]
+        captured = self.squares[end_index]
+        captured_slot = None
+        # Estado anterior que no se puede deducir de la jugada
+        previous_state = (self.castling, self.ep_square, self.halfmove_clock, self.hash)
+        # El hash se actualiza con XOR: pieza sale del origen, entra en destino y cambia el turno
+        keys = ZOBRIST_PIECES[piece_key]
+        h = self.hash ^ keys[start_index] ^ keys[end_index] ^ ZOBRIST_BLACK_TO_MOVE
+        if self.ep_square is not None:
+            h ^= self.ep_hash()
+        castling = self.castling & CASTLING_MASK[start_index] & CASTLING_MASK[end_index]
+        if castling != self.castling:
+            h ^= ZOBRIST_CASTLING[self.castling] ^ ZOBRIST_CASTLING[castling]
+            self.castling = castling
+        # La evaluación se actualiza igual: se resta la entrada del origen y se suma la del destino
+        mg_table = Evaluation.MG_TABLES[piece_key]
+        eg_table = Evaluation.EG_TABLES[piece_key]
+        self.eval_mg += mg_table[end_index] - mg_table[start_index]
+        self.eval_eg += eg_table[end_index] - eg_table[start_index]
+        if captured is not None:
+            captured_positions = self.current_positions[captured]
+            captured_slot = captured_positions.index(end_pos)
+            del captured_positions[captured_slot]
+            h ^= ZOBRIST_PIECES[captured][end_index]
+            self.eval_mg -= Evaluation.MG_TABLES[captured][end_index]
+            self.eval_eg -= Evaluation.EG_TABLES[captured][end_index]
+            self.phase -= Evaluation.PHASE[captured]
+        self.turn = "b" if self.turn == "w" else "w"
+
+        # Se sustituye en el mismo índice para que la lista quede igual al deshacer
+        positions = self.current_positions[piece_key]
+        positions[positions.index(start_pos)] = end_pos
+        self.squares[start_index] = None
+        self.squares[end_index] = piece_key
+
+        # Relojes y casilla al paso (tras un avance doble de peón)
+        is_pawn = piece_key[0] == "p"
+        self.halfmove_clock = 0 if is_pawn or captured is not None else self.halfmove_clock + 1
+        if piece_key[-1] == "b":
+            self.fullmove_number += 1
+        if is_pawn and abs(end_index - start_index) == 16:
+            self.ep_square = (start_pos[0], (start_pos[1] + end_pos[1]) // 2)
+            h ^= self.ep_hash()
+        else:
+            self.ep_square = None
+        self.hash = h
+
+        if self.bitboards is not None:
+            self.bitboards.move_piece(piece_key, start_pos, end_pos, captured)
+
+        # Registro de deshacer: (pieza, origen, destino, capturada, índice de la capturada en su lista,
+        # enroques, casilla al paso, reloj de 50 jugadas y hash anteriores)
+        self.move_stack.append((piece_key, start_pos, end_pos, captured, captured_slot) + previous_state)
+        return captured
+
+    def unmake_move(self):
+        # Deshace la última jugada hecha con make_move
+        (piece_key, start_pos, end_pos, captured, captured_slot,
+         self.castling, self.ep_square, self.halfmove_clock, self.hash) = self.move_stack.pop()
+        start_index = start_pos[1] * 8 + start_pos[0]
+        end_index = end_pos[1] * 8 + end_pos[0]
 
-        if not simulate:
-            self.current_positions[piece_key].append(end_pos)
+        positions = self.current_positions[piece_key]
+        positions[positions.index(end_pos)] = start_pos
+        self.squares[start_index] = piece_key
+        self.squares[end_index] = captured
+        mg_table = Evaluation.MG_TABLES[piece_key]
+        eg_table = Evaluation.EG_TABLES[piece_key]
+        self.eval_mg -= mg_table[end_index] - mg_table[start_index]
+        self.eval_eg -= eg_table[end_index] - eg_table[start_index]
+        if captured is not None:
+            self.current_positions[captured].insert(captured_slot, end_pos)
+            self.eval_mg += Evaluation.MG_TABLES[captured][end_index]
+            self.eval_eg += Evaluation.EG_TABLES[captured][end_index]
+            self.phase += Evaluation.PHASE[captured]
+        self.turn = "b" if self.turn == "w" else "w"
+        if piece_key[-1] == "b":
+            self.fullmove_number -= 1
+
+        if self.bitboards is not None:
+            self.bitboards.unmove_piece(piece_key, start_pos, end_pos, captured)
 
     def get_all_pieces(self):
         # Devuelve una lista de todas las piezas en el tablero
@@ -56,57 +327,171 @@ class Board:
         positions = self.current_positions.get(key, [])
         return positions[0] if positions else None
 
+    def is_square_attacked(self, pos, by_color):
+        # Verifica si alguna pieza de by_color ataca la casilla. Se mira hacia fuera desde la casilla
+        # (saltos de caballo y rey, peones y rayos) y cada rayo se detiene en el primer bloqueador.
+        sq = pos[1] * 8 + pos[0]
+        if self.bitboards is not None:
+            return self.bitboards.is_square_attacked(sq, by_color)
+        squares = self.squares
+
+        knight = f"knight_{by_color}"
+        for target in KNIGHT_TABLE[sq]:
+            if squares[target] == knight:
+                return True
+        pawn = f"pawn_{by_color}"
+        for target in PAWN_ATTACKER_TABLE[by_color][sq]:
+            if squares[target] == pawn:
+                return True
+        king = f"king_{by_color}"
+        for target in KING_TABLE[sq]:
+            if squares[target] == king:
+                return True
+
+        queen = f"queen_{by_color}"
+        bishop = f"bishop_{by_color}"
+        rook = f"rook_{by_color}"
+        for diagonal, ray in RAY_TABLE[sq]:
+            slider = bishop if diagonal else rook
+            for target in ray:
+                piece_key = squares[target]
+                if piece_key is not None:
+                    if piece_key == slider or piece_key == queen:
+                        return True
+                    break
+        return False
+
     def is_king_in_check(self, color):
         # Verifica si el rey está en jaque
         king_pos = self.get_king_position(color)
         if not king_pos:
             return False
         opponent_color = "b" if color == "w" else "w"
-        for piece_key, positions in self.current_positions.items():
-            if piece_key.endswith(opponent_color):
+        return self.is_square_attacked(king_pos, opponent_color)
+
+    def is_legal_move(self, piece_key, start_pos, end_pos):
+        # Una jugada es legal si no deja al propio rey en jaque (se prueba en el sitio y se deshace)
+        color = piece_key[-1]
+        self.make_move(piece_key, start_pos, end_pos)
+        in_check = self.is_king_in_check(color)
+        self.unmake_move()
+        return not in_check
+
+    def legal_moves(self, color):
+        # Devuelve las jugadas estrictamente legales [(pieza, origen, destino)] del color indicado.
+        # Las piezas clavadas y la máscara de evasión de jaque se calculan una vez por posición,
+        # así que cada jugada se filtra sin simularla. Con bitboards se hace todo con máscaras.
+        if self.bitboards is not None:
+            return self.bitboards.legal_moves(color)
+        opponent = "b" if color == "w" else "w"
+        king_key = f"king_{color}"
+        king_pos = self.get_king_position(color)
+        squares = self.squares
+
+        check_mask = None  # casillas que tapan o capturan al único atacante
+        checkers = 0
+        pins = {}  # casilla de la pieza clavada -> casillas permitidas en su línea
+        if king_pos is not None:
+            king_sq = king_pos[1] * 8 + king_pos[0]
+            for table, attacker in (
+                (KNIGHT_TABLE[king_sq], f"knight_{opponent}"),
+                (PAWN_ATTACKER_TABLE[opponent][king_sq], f"pawn_{opponent}"),
+            ):
+                for target in table:
+                    if squares[target] == attacker:
+                        checkers += 1
+                        check_mask = {target}
+
+            queen = f"queen_{opponent}"
+            bishop = f"bishop_{opponent}"
+            rook = f"rook_{opponent}"
+            for diagonal, ray in RAY_TABLE[king_sq]:
+                slider = bishop if diagonal else rook
+                blocker = None
+                for i, target in enumerate(ray):
+                    piece_key = squares[target]
+                    if piece_key is None:
+                        continue
+                    if piece_key.endswith(color):
+                        if blocker is not None:
+                            break
+                        blocker = target
+                        continue
+                    if piece_key == slider or piece_key == queen:
+                        line = set(ray[:i + 1])
+                        if blocker is None:
+                            checkers += 1
+                            check_mask = line
+                        else:
+                            pins[blocker] = line
+                    break
+
+        moves = []
+        # Con jaque doble solo puede moverse el rey
+        if checkers < 2:
+            for piece_key, positions in self.current_positions.items():
+                if piece_key == king_key or not piece_key.endswith(color):
+                    continue
+                piece_obj = self.get_piece_object(piece_key.split("_")[0], color)
                 for pos in positions:
-                    piece_type = piece_key.split("_")[0]
-                    piece_obj = self.get_piece_object(piece_type, opponent_color)
-                    moves = piece_obj.get_moves(pos, self, simulate=True)
-                    if king_pos in moves:
-                        return True
-        return False
+                    allowed = pins.get(pos[1] * 8 + pos[0])
+                    for end_pos in piece_obj.get_moves(pos, self):
+                        end_index = end_pos[1] * 8 + end_pos[0]
+                        if check_mask is not None and end_index not in check_mask:
+                            continue
+                        if allowed is not None and end_index not in allowed:
+                            continue
+                        moves.append((piece_key, pos, end_pos))
+
+        if king_pos is not None:
+            king_moves = self.get_piece_object("king", color).get_moves(king_pos, self)
+            # Se quita el rey para que no tape los rayos que lo atraviesan
+            squares[king_sq] = None
+            for end_pos in king_moves:
+                if not self.is_square_attacked(end_pos, opponent):
+                    moves.append((king_key, king_pos, end_pos))
+            squares[king_sq] = king_key
+        return moves
+
+    def legal_moves_from(self, pos):
+        # Devuelve los destinos legales de la pieza situada en pos
+        piece_key = self.piece_at(pos)
+        if piece_key is None:
+            return []
+        return [end for _, start, end in self.legal_moves(piece_key[-1]) if start == pos]
 
     def is_checkmate(self, color):
         # Verifica si el jugador está en jaque mate
-        if not self.is_king_in_check(color):
-            return False
+        return self.is_king_in_check(color) and not self.legal_moves(color)
 
-        for piece_key, positions in self.current_positions.items():
-            if piece_key.endswith(color):
-                for pos in positions:
-                    piece_type = piece_key.split("_")[0]
-                    piece_obj = self.get_piece_object(piece_type, color)
-                    legal_moves = piece_obj.get_moves(pos, self)
-                    for move in legal_moves:
-                        temp_board = self.copy()
-                        temp_board.move_piece(piece_key, pos, move, simulate=True)
-                        if not temp_board.is_king_in_check(color):
-                            return False
-        return True
+    def is_stalemate(self, color):
+        # Verifica si el jugador no tiene jugadas legales sin estar en jaque (tablas)
+        return not self.is_king_in_check(color) and not self.legal_moves(color)
 
     def copy(self):
         # Crea una copia del estado actual del tablero
         new_board = Board()
         new_board.current_positions = {k: list(v) for k, v in self.current_positions.items()}
+        new_board.squares = list(self.squares)
+        new_board.move_stack = list(self.move_stack)
+        new_board.turn = self.turn
+        new_board.castling = self.castling
+        new_board.ep_square = self.ep_square
+        new_board.halfmove_clock = self.halfmove_clock
+        new_board.fullmove_number = self.fullmove_number
+        new_board.hash = self.hash
+        new_board.eval_mg = self.eval_mg
+        new_board.eval_eg = self.eval_eg
+        new_board.phase = self.phase
+        if self.bitboards is not None:
+            new_board.bitboards = self.bitboards.copy()
         return new_board
 
     def get_piece_object(self, name, color):
         # Devuelve una instancia de clase de pieza (ej. Rook, Queen...)
-        piece_classes = {
-            "pawn": Pawn,
-            "knight": Knight,
-            "bishop": Bishop,
-            "rook": Rook,
-            "queen": Queen,
-            "king": King,
-        }
-        return piece_classes[name](name, color)
+        if self.bitboards is not None:
+            return Bitboard.BitboardPiece(name, color)
+        return PIECE_CLASSES[name](name, color)
 
 
 def pos_to_notation(pos):
@@ -114,6 +499,53 @@ def pos_to_notation(pos):
     files = "abcdefgh"
     return f"{files[pos[0]]}{8 - pos[1]}"
 
+def notation_to_pos(square):
+    # Convierte una casilla como 'e4' en (col, row)
+    return ("abcdefgh".index(square[0]), 8 - int(square[1]))
+
+
+def parse_fen(fen):
+    # Devuelve (posiciones, turno, enroques, casilla_al_paso, reloj_50, número_de_jugada) o lanza ValueError.
+    # La primera fila del FEN es la octava, que en el modelo es la fila 0.
+    fields = fen.split()
+    if len(fields) < 4:
+        raise ValueError(f"FEN incompleto: {fen!r}")
+    rows = fields[0].split("/")
+    if len(rows) != 8:
+        raise ValueError(f"FEN con {len(rows)} filas: {fen!r}")
+    positions = {key: [] for key in Bitboard.PIECE_KEYS}
+    for row, text in enumerate(rows):
+        col = 0
+        for char in text:
+            if char.isdigit():
+                col += int(char)
+            elif char in FEN_PIECES and col < 8:
+                positions[FEN_PIECES[char]].append((col, row))
+                col += 1
+            else:
+                raise ValueError(f"Carácter no válido en FEN: {char!r}")
+        if col != 8:
+            raise ValueError(f"La fila {row + 1} del FEN no tiene 8 casillas: {fen!r}")
+
+    turn = fields[1]
+    if turn not in ("w", "b"):
+        raise ValueError(f"Turno no válido en FEN: {turn!r}")
+    castling = 0
+    if fields[2] != "-":
+        letters = dict((letter, bit) for bit, letter in CASTLING_LETTERS)
+        for char in fields[2]:
+            if char not in letters:
+                raise ValueError(f"Enroque no válido en FEN: {fields[2]!r}")
+            castling |= letters[char]
+    # La casilla al paso es la que salta el peón, así que solo puede estar en la fila 3 o en la 6
+    ep = fields[3]
+    if ep != "-" and (len(ep) != 2 or ep[0] not in "abcdefgh" or ep[1] not in "36"):
+        raise ValueError(f"Casilla al paso no válida en FEN: {ep!r}")
+    ep_square = None if ep == "-" else notation_to_pos(ep)
+    halfmove_clock = int(fields[4]) if len(fields) > 4 else 0
+    fullmove_number = int(fields[5]) if len(fields) > 5 else 1
+    return positions, turn, castling, ep_square, halfmove_clock, fullmove_number
+
 # Clase base para todas las piezas
 class Piece:
     def __init__(self, name, color):
@@ -123,6 +555,14 @@ class Piece:
     def get_moves(self, pos, board, simulate=False):
         return []
 
+    def is_friendly_piece(self, pos, board):
+        piece_key = board.piece_at(pos)
+        return piece_key is not None and piece_key.endswith(self.color)
+
+    def is_enemy_piece(self, pos, board):
+        piece_key = board.piece_at(pos)
+        return piece_key is not None and not piece_key.endswith(self.color)
+
 # Clase para los peones
 class Pawn(Piece):
     def get_moves(self, pos, board, simulate=False):
@@ -147,13 +587,7 @@ class Pawn(Piece):
         return moves
 
     def is_occupied(self, pos, board):
-        return any(pos in positions for positions in board.current_positions.values())
-
-    def is_enemy_piece(self, pos, board):
-        for piece_key, positions in board.current_positions.items():
-            if pos in positions and not piece_key.endswith(self.color):
-                return True
-        return False
+        return board.piece_at(pos) is not None
 
 # Clase para los caballos
 class Knight(Piece):
@@ -170,12 +604,6 @@ class Knight(Piece):
                     moves.append((x, y))
         return moves
 
-    def is_friendly_piece(self, pos, board):
-        for piece_key, positions in board.current_positions.items():
-            if pos in positions and piece_key.endswith(self.color):
-                return True
-        return False
-
 # Clase para los alfiles
 class Bishop(Piece):
     def get_moves(self, pos, board, simulate=False):
@@ -189,27 +617,17 @@ class Bishop(Piece):
                 x += dx
                 y += dy
                 if 0 <= x <= 7 and 0 <= y <= 7:
-                    if self.is_friendly_piece((x, y), board):
+                    # Una sola consulta al índice: casilla propia, vacía o enemiga
+                    target = board.squares[y * 8 + x]
+                    if target is not None and target.endswith(self.color):
                         break
                     moves.append((x, y))
-                    if self.is_enemy_piece((x, y), board):
+                    if target is not None:
                         break
                 else:
                     break
         return moves
 
-    def is_friendly_piece(self, pos, board):
-        for piece_key, positions in board.current_positions.items():
-            if pos in positions and piece_key.endswith(self.color):
-                return True
-        return False
-
-    def is_enemy_piece(self, pos, board):
-        for piece_key, positions in board.current_positions.items():
-            if pos in positions and not piece_key.endswith(self.color):
-                return True
-        return False
-
 # Clase para las torres(hereda la lógica del alfil pero cambia las direcciones)
 class Rook(Bishop):
     def get_moves(self, pos, board, simulate=False):
@@ -238,9 +656,13 @@ class King(Piece):
                         moves.append((x, y))
         return moves
 
-    def is_friendly_piece(self, pos, board):
-        for piece_key, positions in board.current_positions.items():
-            if pos in positions and piece_key.endswith(self.color):
-                return True
-        return False
 
+# Clases de referencia por nombre de pieza
+PIECE_CLASSES = {
+    "pawn": Pawn,
+    "knight": Knight,
+    "bishop": Bishop,
+    "rook": Rook,
+    "queen": Queen,
+    "king": King,
+}
@@ -0,0 +1,112 @@
+# Perft: cuenta los nodos hoja del árbol de jugadas legales para validar y medir la generación de
+# movimientos de Model. Uso: python Perft.py --suite  |  python Perft.py --position start --depth 4 --divide
+import argparse
+import sys
+import time
+
+import Model as m
+
+# Posiciones de referencia (FEN) con recuentos conocidos. Solo se incluyen las profundidades en las que
+# las reglas del modelo (sin enroque, captura al paso ni coronación) coinciden con el ajedrez estándar.
+REFERENCE_POSITIONS = {
+    "start": {
+        "fen": m.START_FEN,
+        "counts": {1: 20, 2: 400, 3: 8902, 4: 197281},
+    },
+    # Posición 3 de la Chess Programming Wiki: la captura al paso aparece a profundidad 3
+    "cpw3": {
+        "fen": "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+        "counts": {1: 14, 2: 191},
+    },
+    # Posición 6 de la Chess Programming Wiki: sin jugadas especiales hasta profundidad 4
+    "cpw6": {
+        "fen": "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+        "counts": {1: 46, 2: 2079, 3: 89890, 4: 3894594},
+    },
+}
+
+
+def load_position(name, use_bitboards=False):
+    # Crea un tablero con la posición de referencia indicada, o con cualquier FEN si name no es una de ellas
+    fen = REFERENCE_POSITIONS[name]["fen"] if name in REFERENCE_POSITIONS else name
+    return m.Board.from_fen(fen, use_bitboards=use_bitboards)
+
+
+def perft(board, depth):
+    # Cuenta las hojas a la profundidad indicada (en el último nivel basta con contar las jugadas)
+    if depth == 0:
+        return 1
+    moves = board.legal_moves(board.turn)
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        board.make_move(*move)
+        nodes += perft(board, depth - 1)
+        board.unmake_move()
+    return nodes
+
+
+def divide(board, depth):
+    # Devuelve [(jugada, hojas)] para cada jugada de la raíz, útil para localizar diferencias
+    results = []
+    for piece_key, start_pos, end_pos in board.legal_moves(board.turn):
+        board.make_move(piece_key, start_pos, end_pos)
+        nodes = perft(board, depth - 1)
+        board.unmake_move()
+        results.append((f"{m.pos_to_notation(start_pos)}{m.pos_to_notation(end_pos)}", nodes))
+    return results
+
+
+def run_suite(max_depth, use_bitboards=False):
+    # Ejecuta todas las posiciones de referencia hasta max_depth. Devuelve True si todo coincide.
+    all_ok = True
+    for name, reference in REFERENCE_POSITIONS.items():
+        for depth, expected in sorted(reference["counts"].items()):
+            if depth > max_depth:
+                break
+            board = load_position(name, use_bitboards)
+            start = time.perf_counter()
+            nodes = perft(board, depth)
+            elapsed = time.perf_counter() - start
+            ok = nodes == expected
+            all_ok = all_ok and ok
+            nps = nodes / elapsed if elapsed > 0 else 0
+            status = "OK" if ok else f"FAIL (expected {expected})"
+            print(f"{name:8} depth {depth}: {nodes:>10} nodes  {elapsed:8.3f}s  {nps:>10.0f} nps  {status}")
+    return all_ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perft para la generación de movimientos de Model")
+    parser.add_argument("--position", default="start", help=f"{', '.join(sorted(REFERENCE_POSITIONS))} o un FEN")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--divide", action="store_true", help="muestra las hojas por jugada de la raíz")
+    parser.add_argument("--suite", action="store_true", help="comprueba todas las posiciones de referencia")
+    parser.add_argument("--bitboards", action="store_true", help="usa el motor de bitboards")
+    args = parser.parse_args()
+
+    if args.suite:
+        sys.exit(0 if run_suite(args.depth, args.bitboards) else 1)
+
+    board = load_position(args.position, args.bitboards)
+    start = time.perf_counter()
+    if args.divide:
+        results = divide(board, args.depth)
+        for move, nodes in results:
+            print(f"{move}: {nodes}")
+        total = sum(nodes for _, nodes in results)
+    else:
+        total = perft(board, args.depth)
+    elapsed = time.perf_counter() - start
+    nps = total / elapsed if elapsed > 0 else 0
+    print(f"Nodes: {total}  Time: {elapsed:.3f}s  NPS: {nps:.0f}")
+
+    expected = REFERENCE_POSITIONS.get(args.position, {}).get("counts", {}).get(args.depth)
+    if expected is not None and expected != total:
+        print(f"Expected {expected}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
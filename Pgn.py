@@ -0,0 +1,347 @@
+# Lectura y escritura de partidas en PGN. El lector es un generador que procesa el fichero línea a línea
+# (memoria constante aunque el archivo ocupe gigas) y las jugadas SAN se decodifican contra Model.Board.
+# El modo masivo reparte la validación entre procesos. Uso:
+#   python Pgn.py partidas.pgn --workers 8
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import Model as m
+
+RESULTS = ("1-0", "0-1", "1/2-1/2", "*")
+SAN_LETTERS = {"N": "knight", "B": "bishop", "R": "rook", "Q": "queen", "K": "king"}
+PIECE_LETTERS = {name: letter for letter, name in SAN_LETTERS.items()}
+# Partidas que se envían juntas a cada proceso en el modo masivo
+BATCH_SIZE = 200
+
+
+class PgnGame:
+    def __init__(self, headers, moves, result):
+        self.headers = headers  # {etiqueta: valor} en el orden del fichero
+        self.moves = moves  # jugadas en SAN, sin números ni comentarios
+        self.result = result
+
+    def board(self):
+        # Tablero de partida: la posición inicial o la de la etiqueta FEN
+        fen = self.headers.get("FEN")
+        return m.Board.from_fen(fen) if fen else m.Board()
+
+    def replay(self):
+        # Juega las jugadas sobre el tablero y lo devuelve; lanza ValueError si la etiqueta FEN o alguna
+        # jugada no es válida
+        try:
+            board = self.board()
+        except ValueError as e:
+            raise ValueError(f"FEN: {e}") from None
+        for ply, san in enumerate(self.moves):
+            try:
+                board.make_move(*san_to_move(board, san))
+            except ValueError as e:
+                raise ValueError(f"ply {ply + 1} ({san}): {e}") from None
+        return board
+
+
+def iter_game_texts(stream):
+    # Separa un flujo PGN en el texto de cada partida sin interpretarlo. Una partida empieza con la
+    # primera cabecera que aparece después de jugadas.
+    lines = []
+    in_moves = False
+    for line in stream:
+        stripped = line.strip()
+        if stripped.startswith("[") and in_moves:
+            yield "".join(lines)
+            lines = []
+            in_moves = False
+        elif stripped and not stripped.startswith("[") and not stripped.startswith("%"):
+            in_moves = True
+        lines.append(line)
+    if any(line.strip() for line in lines):
+        yield "".join(lines)
+
+
+def parse_game(text):
+    # Convierte el texto de una partida en PgnGame. Se descartan comentarios {..} y ;, variantes (..),
+    # NAG ($n) y números de jugada.
+    headers = {}
+    moves = []
+    result = "*"
+    comment = False
+    depth = 0
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not comment and depth == 0 and stripped.startswith("["):
+            key, _, value = stripped[1:-1].partition(" ")
+            headers[key] = _tag_value(value)
+            continue
+        if stripped.startswith("%"):
+            continue
+        token = ""
+        for char in line + " ":
+            if comment:
+                comment = char != "}"
+                continue
+            if not (char.isspace() or char in "{;()"):
+                token += char
+                continue
+            # Fin de palabra: se guarda antes de entrar o salir de una variante
+            if token and depth == 0:
+                result = _add_token(token, moves, result)
+            token = ""
+            if char == "{":
+                comment = True
+            elif char == ";":
+                break
+            elif char == "(":
+                depth += 1
+            elif char == ")":
+                depth -= 1
+    return PgnGame(headers, moves, headers.get("Result", result) if result == "*" else result)
+
+
+def _tag_value(text):
+    # Valor de una etiqueta sin las comillas, deshaciendo los escapes \" y \\
+    text = text.strip()
+    if not text.startswith('"'):
+        return text
+    value = ""
+    escaped = False
+    for char in text[1:]:
+        if escaped:
+            value += char
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == '"':
+            break
+        else:
+            value += char
+    return value
+
+
+def _escape_tag(value):
+    # Dentro de una etiqueta la barra invertida y las comillas van escapadas con \
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _add_token(token, moves, result):
+    # Añade una jugada (quitando el número de jugada pegado, como "12.e4") y devuelve el resultado
+    if token in RESULTS:
+        return token
+    if token.startswith("$"):
+        return result
+    token = token.lstrip("0123456789").lstrip(".").rstrip("!?")
+    if token:
+        moves.append(token)
+    return result
+
+
+def read_games(stream):
+    # Generador de PgnGame a partir de un fichero de texto abierto
+    for text in iter_game_texts(stream):
+        yield parse_game(text)
+
+
+def san_to_move(board, san):
+    # Devuelve la jugada (pieza, origen, destino) de board que corresponde a san o lanza ValueError
+    text = san.rstrip("+#!?")
+    if text.startswith("O-O") or text.startswith("0-0"):
+        raise ValueError("el modelo no admite el enroque")
+    if "=" in text:
+        raise ValueError("el modelo no admite la coronación")
+    if len(text) < 2:
+        raise ValueError("jugada SAN no válida")
+    name = SAN_LETTERS.get(text[0], "pawn")
+    if name != "pawn":
+        text = text[1:]
+    try:
+        end = m.notation_to_pos(text[-2:])
+    except (ValueError, IndexError):
+        raise ValueError("jugada SAN no válida") from None
+    hint = text[:-2].replace("x", "")
+    piece_key = f"{name}_{board.turn}"
+
+    candidates = []
+    for move in board.legal_moves(board.turn):
+        if move[0] != piece_key or move[2] != end:
+            continue
+        square = m.pos_to_notation(move[1])
+        if all(char in square for char in hint):
+            candidates.append(move)
+    if len(candidates) != 1:
+        raise ValueError("jugada ilegal" if not candidates else "jugada ambigua")
+    return candidates[0]
+
+
+def move_to_san(board, move):
+    # Escribe la jugada (pieza, origen, destino) de board en SAN, con + o # si da jaque o mate
+    piece_key, start, end = move
+    name = piece_key.split("_")[0]
+    capture = board.piece_at(end) is not None
+    legal = board.legal_moves(board.turn)
+    if name == "pawn":
+        san = m.pos_to_notation(start)[0] + "x" if capture else ""
+    else:
+        san = PIECE_LETTERS[name]
+        rivals = [other[1] for other in legal if other[0] == piece_key and other[2] == end and other[1] != start]
+        if rivals:
+            square = m.pos_to_notation(start)
+            if all(pos[0] != start[0] for pos in rivals):
+                san += square[0]
+            elif all(pos[1] != start[1] for pos in rivals):
+                san += square[1]
+            else:
+                san += square
+        if capture:
+            san += "x"
+    san += m.pos_to_notation(end)
+
+    board.make_move(*move)
+    if board.is_king_in_check(board.turn):
+        san += "#" if not board.legal_moves(board.turn) else "+"
+    board.unmake_move()
+    return san
+
+
+def moves_to_san(moves, board=None):
+    # Convierte una lista de jugadas (pieza, origen, destino) en SAN jugándolas desde board
+    board = board or m.Board()
+    san_moves = []
+    for move in moves:
+        san_moves.append(move_to_san(board, move))
+        board.make_move(*move)
+    return san_moves
+
+
+def game_to_pgn(san_moves, result="*", headers=None, first_move=1, black_first=False):
+    # Texto PGN de una partida: las siete etiquetas obligatorias (más las que se pasen) y las jugadas
+    # numeradas en líneas de hasta 80 caracteres. Las obligatorias van primero y en su orden (Result la
+    # séptima); el Result de headers se ignora porque manda el argumento result.
+    tags = {"Event": "?", "Site": "?", "Date": "????.??.??", "Round": "?", "White": "?", "Black": "?",
+            "Result": result}
+    extra = {}
+    for key, value in (headers or {}).items():
+        if key == "Result":
+            continue
+        if key in tags:
+            tags[key] = value
+        else:
+            extra[key] = value
+    tags.update(extra)
+    lines = [f'[{key} "{_escape_tag(value)}"]' for key, value in tags.items()]
+    lines.append("")
+
+    tokens = []
+    number = first_move
+    white_to_move = not black_first
+    for i, san in enumerate(san_moves):
+        # El número va pegado a la jugada para que no quede solo al final de una línea
+        if white_to_move:
+            tokens.append(f"{number}. {san}")
+        elif i == 0:
+            tokens.append(f"{number}... {san}")
+        else:
+            tokens.append(san)
+        if not white_to_move:
+            number += 1
+        white_to_move = not white_to_move
+    tokens.append(result)
+
+    line = ""
+    for token in tokens:
+        if line and len(line) + 1 + len(token) > 80:
+            lines.append(line)
+            line = token
+        else:
+            line = f"{line} {token}" if line else token
+    lines.append(line)
+    return "\n".join(lines) + "\n\n"
+
+
+def append_game(path, san_moves, result="*", headers=None):
+    # Añade una partida al final de un fichero PGN
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(game_to_pgn(san_moves, result, headers))
+
+
+def _validate_batch(texts):
+    # Trabajo de cada proceso: interpreta y reproduce un bloque de partidas
+    start = time.perf_counter()
+    games = 0
+    plies = 0
+    errors = []
+    for text in texts:
+        game = parse_game(text)
+        games += 1
+        try:
+            game.replay()
+            plies += len(game.moves)
+        except ValueError as e:
+            errors.append((game.headers.get("Event", "?"), game.headers.get("Round", "?"), str(e)))
+    return {"pid": os.getpid(), "games": games, "plies": plies, "errors": errors,
+            "elapsed": time.perf_counter() - start}
+
+
+def validate_file(path, workers=None, batch_size=BATCH_SIZE, max_errors=100):
+    # Valida todas las partidas del fichero repartiendo bloques entre procesos. El fichero se lee en
+    # streaming y solo hay unos pocos bloques en memoria a la vez. Devuelve (totales, stats_por_proceso).
+    workers = workers or os.cpu_count() or 1
+    totals = {"games": 0, "plies": 0, "invalid": 0, "errors": []}
+    per_worker = {}
+
+    def collect(done):
+        for future in done:
+            batch = future.result()
+            totals["games"] += batch["games"]
+            totals["plies"] += batch["plies"]
+            totals["invalid"] += len(batch["errors"])
+            totals["errors"].extend(batch["errors"][:max_errors - len(totals["errors"])])
+            stats = per_worker.setdefault(batch["pid"], {"games": 0, "plies": 0, "elapsed": 0.0})
+            stats["games"] += batch["games"]
+            stats["plies"] += batch["plies"]
+            stats["elapsed"] += batch["elapsed"]
+
+    start = time.perf_counter()
+    with open(path, encoding="utf-8", errors="replace") as f, ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        batch = []
+        for text in iter_game_texts(f):
+            batch.append(text)
+            if len(batch) < batch_size:
+                continue
+            pending.add(pool.submit(_validate_batch, batch))
+            batch = []
+            # Como mucho dos bloques en cola por proceso
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+        if batch:
+            pending.add(pool.submit(_validate_batch, batch))
+        collect(pending)
+    totals["elapsed"] = time.perf_counter() - start
+    return totals, per_worker
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Valida y reproduce las partidas de un fichero PGN")
+    parser.add_argument("path")
+    parser.add_argument("--workers", type=int, default=None, help="procesos (por defecto, uno por núcleo)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    totals, per_worker = validate_file(args.path, args.workers, args.batch_size)
+    for pid, stats in sorted(per_worker.items()):
+        rate = stats["games"] / stats["elapsed"] if stats["elapsed"] > 0 else 0
+        print(f"worker {pid}: {stats['games']} games  {stats['plies']} plies  {rate:.0f} games/s")
+    for event, round_, error in totals["errors"]:
+        print(f"invalid game ({event}, round {round_}): {error}", file=sys.stderr)
+    elapsed = totals["elapsed"]
+    rate = totals["games"] / elapsed if elapsed > 0 else 0
+    print(f"{totals['games']} games, {totals['invalid']} invalid, {totals['plies']} plies "
+          f"in {elapsed:.1f}s ({rate:.0f} games/s)")
+    sys.exit(1 if totals["invalid"] else 0)
+
+
+if __name__ == "__main__":
+    main()
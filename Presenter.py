@@ -1,13 +1,17 @@
 # Actúa como intermediario entre el modelo (lógica del ajedrez) y la vista (interfaz gráfica).
-import pygame
+import time
+
+import Book
+import Engine
 import Model as m
+import Pgn
 import View
-# Constantes para el tamaño del tablero
-BOARD_SIZE_RATIO = 0.9
-BOARD_MARGIN_RATIO = (1 - BOARD_SIZE_RATIO) / 2
+
+# Segundos que puede pensar la pista cuando la posición no está en el libro
+HINT_TIME = 0.3
 
 class ChessPresenter:
-    def __init__(self, win):
+    def __init__(self, win, pgn_path=None, book_path=None, tablebase_dir=None):
         self.win = win
         self.view = View.Interface(win) # Interfaz de usuario
         self.model = m.Board() # Lógica del tablero
@@ -16,45 +20,48 @@ class ChessPresenter:
         self.selected_piece = None # Pieza seleccionada por el jugador
         self.selected_pos = None # Posición seleccionada
         self.move_log = []  # Registro de movimientos realizados
+        # Si hay fichero PGN, cada partida se anota en SAN y se guarda al terminar o reiniciarse
+        self.pgn_path = pgn_path
+        self.san_log = []
 
         self.game_started = False
         self.settings_open = False
-        # Mapa de nombres de piezas a sus clases
-        self.class_map = {
-            "pawn": m.Pawn,
-            "knight": m.Knight,
-            "bishop": m.Bishop,
-            "rook": m.Rook,
-            "queen": m.Queen,
-            "king": m.King,
-        }
-
-        self.piece_objects = self.load_piece_objects()
-
-    def load_piece_objects(self):
-        # Crea instancias de cada tipo de pieza según las posiciones actuales del modelo
-        objs = {}
-        for piece_key in self.model.current_positions.keys():
-            name, color = piece_key.split("_")
-            cls = self.class_map.get(name, m.Piece)
-            objs[piece_key] = cls(name, color)
-        return objs
+        # Zonas de la pantalla pendientes de repintar ("board", "sidebar" o "all")
+        self.dirty = {"all"}
+        # La partida terminó y se reinicia cuando se cierren los mensajes finales
+        self.pending_reset = False
+        # Jugadas legales del bando que mueve, {origen: [destinos]}, calculadas una vez por posición
+        self.legal_moves_cache = {}
+        self.legal_moves_hash = None
+        # Rival controlado por el ordenador (se activa desde los ajustes); piensa en otro proceso
+        self.engine_color = "b"
+        self.engine = None
+        # Libro de aperturas (opcional) que usan el ordenador y el botón de pista. La pista fuera del
+        # libro sale de una búsqueda corta en otro proceso; se guarda junto al hash de la posición a la
+        # que corresponde, y hint_pending es el hash de la posición que se está analizando.
+        self.book_path = book_path
+        self.book = Book.OpeningBook(book_path) if book_path else None
+        self.hint_engine = None
+        self.hint = None
+        self.hint_pending = None
+        # Directorio de tablas de finales (opcional) para el ordenador y las pistas
+        self.tablebase_dir = tablebase_dir
 
     def get_square_under_mouse(self, pos):
-        # Convierte la posición del ratón en una celda del tablero
-        board_margin = self.win.get_size()[1] * BOARD_MARGIN_RATIO
-        board_size = self.win.get_size()[1] * BOARD_SIZE_RATIO
-        square_size = board_size / 8
-        x, y = pos
-        col = int((x - board_margin) // square_size)
-        row = int((y - board_margin) // square_size)
-        if 0 <= col < 8 and 0 <= row < 8:
-            return (col, row)
-        return None
+        # Convierte la posición del ratón en una celda del tablero (misma geometría que la vista)
+        return self.view.layout.square_at(pos)
 
     def handle_click(self, pos):
         # Gestiona los clics del usuario: botones, tablero o ajustes
 
+        # Con un mensaje o la ayuda en pantalla, el clic solo sirve para cerrarlos
+        if self.view.has_overlay():
+            if self.view.handle_overlay_click(pos):
+                self.mark_dirty()
+                if self.pending_reset and not self.view.has_overlay():
+                    self.reset_game()
+            return
+
         # Botón "Start"
         if self.view.start_button_rect and self.view.start_button_rect.collidepoint(pos):
             self.view.start_pressed = True
@@ -67,27 +74,38 @@ class ChessPresenter:
             self.view.settings_pressed = True
             self.view.start_pressed = False
             self.settings_open = not self.settings_open
+            self.mark_dirty()
+            return
+
+        # Botón de pista
+        if self.game_started and self.view.hint_button_rect and self.view.hint_button_rect.collidepoint(pos):
+            if not self.settings_open:
+                self.suggest_move()
             return
 
         # Ajustes abiertos
         if self.settings_open:
+            self.mark_dirty()
             action = self.view.handle_settings_click(pos)
             if action == "toggle_sound":
                 self.view.sound_on = not self.view.sound_on
             elif action == "toggle_theme":
-                self.view.dark_theme = not self.view.dark_theme
+                self.view.toggle_theme()
             elif action == "toggle_language":
                 self.view.language = "es" if self.view.language == "en" else "en"
+            elif action == "toggle_opponent":
+                self.toggle_engine()
             elif action == "show_help":
-                self.view.display_help()
+                self.view.display_help()  # se dibuja en update() hasta que se cierre
             elif action == "close_settings":
                 self.settings_open = False
                 self.view.settings_pressed = False
             return
-        # Si el juego aún no ha empezado o ya terminó, no se hace nada
-        if not self.game_started or self.view.game_over:
+        # Si el juego aún no ha empezado, ya terminó o es el turno del ordenador, no se hace nada
+        if not self.game_started or self.view.game_over or self.is_engine_turn():
             return
-        # Traduce clic en pantalla a coordenada del tablero
+        # Traduce clic en pantalla a coordenada del tablero (la selección se redibuja)
+        self.mark_dirty("board")
         sq = self.get_square_under_mouse(pos)
         if not sq:
             self.selected_piece = None
@@ -95,78 +113,241 @@ class ChessPresenter:
             return
         # Si no hay pieza seleccionada aún, intenta seleccionarla
         if not self.selected_piece:
-            for piece_key, positions in self.model.current_positions.items():
-                if sq in positions and piece_key.endswith(f"_{self.current_turn}"):
-                    self.selected_piece = piece_key
-                    self.selected_pos = sq
-                    break
+            piece_key = self.model.piece_at(sq)
+            if piece_key and piece_key.endswith(f"_{self.current_turn}"):
+                self.selected_piece = piece_key
+                self.selected_pos = sq
         else:
-            # Si ya hay una pieza seleccionada, intenta moverla
-            piece_obj = self.piece_objects.get(self.selected_piece)
-            if not piece_obj:
-                return
-
-            legal_moves = piece_obj.get_moves(self.selected_pos, self.model)
-            if sq in legal_moves:
-                start_not = m.pos_to_notation(self.selected_pos)
-                end_not = m.pos_to_notation(sq)
-                move_str = f"{start_not} -> {end_not}"
-
-                self.model.move_piece(self.selected_piece, self.selected_pos, sq)
-                self.view.play_move_sound()
-                self.move_log.append(move_str)
-
-                # Cambia de turno
-                self.current_turn = "b" if self.current_turn == "w" else "w"
-                attacked_color = self.current_turn
-                # Verifica si la partida terminó
-                if self.model.game_over:
-                    winner = "Blancas" if self.model.winner == "white" else "Negras"
-                    self.view.play_victory_sound()
-                    self.view.display_message(f"{winner} ganan!", (255, 0, 0))
-                    pygame.time.delay(1000)
-                    self.reset_game()
+            # Si ya hay una pieza seleccionada, intenta moverla (solo jugadas que no dejan al rey en jaque)
+            if sq in self.legal_moves_from(self.selected_pos):
+                if not self.apply_move(self.selected_piece, self.selected_pos, sq):
                     return
-                # Verifica si hay jaque o jaque mate
-                if self.model.is_king_in_check(attacked_color):
-                    message = "Jaque" if self.view.language == "es" else "Check"
-                    self.view.play_check_sound()
-                    self.view.display_message(message, (255, 0, 0))
-                    if self.model.is_checkmate(attacked_color):
-                        self.view.display_message("Jaque Mate", (255, 0, 0))
-                        winner = "Blancas" if attacked_color == "b" else "Negras"
-                        self.view.display_message(f"{winner} ganan!", (255, 0, 0))
-                        pygame.time.delay(1000)
-                        self.reset_game()
-                        return
+                if self.is_engine_turn():
+                    self.engine.start(self.model)
             # Deselecciona después de mover o cancelar
             self.selected_piece = None
             self.selected_pos = None
 
+    def apply_move(self, piece_key, start_pos, end_pos):
+        # Ejecuta una jugada (del jugador o del ordenador), la anota y comprueba el final de la partida.
+        # Devuelve False si la partida terminó (se reinicia al cerrar los mensajes).
+        start_not = m.pos_to_notation(start_pos)
+        end_not = m.pos_to_notation(end_pos)
+        move_str = f"{start_not} -> {end_not}"
+
+        if self.pgn_path:
+            self.san_log.append(Pgn.move_to_san(self.model, (piece_key, start_pos, end_pos)))
+        self.model.move_piece(piece_key, start_pos, end_pos)
+        self.view.play_move_sound()
+        self.move_log.append(move_str)
+        self.mark_dirty("board")
+        self.mark_dirty("sidebar")
+
+        # Cambia de turno
+        self.current_turn = "b" if self.current_turn == "w" else "w"
+        attacked_color = self.current_turn
+        # Verifica si la partida terminó
+        if self.model.game_over:
+            winner = "Blancas" if self.model.winner == "white" else "Negras"
+            self.view.play_victory_sound()
+            self.view.display_message(f"{winner} ganan!", (255, 0, 0))
+            self.end_game("1-0" if self.model.winner == "white" else "0-1")
+            return False
+        # Jugadas legales de la nueva posición; sirven para el mate/ahogado y para los siguientes clics
+        has_moves = bool(self.get_legal_moves())
+        # Verifica si hay jaque o jaque mate
+        if self.model.is_king_in_check(attacked_color):
+            message = "Jaque" if self.view.language == "es" else "Check"
+            self.view.play_check_sound()
+            self.view.display_message(message, (255, 0, 0))
+            if not has_moves:
+                self.view.display_message("Jaque Mate", (255, 0, 0))
+                winner = "Blancas" if attacked_color == "b" else "Negras"
+                self.view.display_message(f"{winner} ganan!", (255, 0, 0))
+                self.end_game("1-0" if attacked_color == "b" else "0-1")
+                return False
+        # Sin jugadas legales y sin jaque: tablas por ahogado
+        elif not has_moves:
+            message = "Tablas" if self.view.language == "es" else "Stalemate"
+            self.view.display_message(message, (255, 0, 0))
+            self.end_game("1/2-1/2")
+            return False
+        return True
+
+    def end_game(self, result):
+        # Bloquea el tablero hasta que se cierren los mensajes finales; entonces se reinicia
+        self.save_game(result)
+        self.view.game_over = True
+        self.pending_reset = True
+        if self.engine is not None:
+            self.engine.cancel()
+
+    def get_legal_moves(self):
+        # Jugadas legales del bando que mueve agrupadas por casilla de origen. Solo se recalculan
+        # cuando cambia la posición (la clave es el hash Zobrist del tablero, que incluye el turno).
+        if self.legal_moves_hash != self.model.hash:
+            moves = {}
+            for _, start, end in self.model.legal_moves(self.current_turn):
+                moves.setdefault(start, []).append(end)
+            self.legal_moves_cache = moves
+            self.legal_moves_hash = self.model.hash
+        return self.legal_moves_cache
+
+    def legal_moves_from(self, pos):
+        # Destinos legales de la pieza en pos (lista vacía si no es del bando que mueve)
+        return self.get_legal_moves().get(pos, [])
+
+    def is_engine_turn(self):
+        return self.view.vs_computer and self.current_turn == self.engine_color
+
+    def toggle_engine(self):
+        # Activa o desactiva el rival controlado por el ordenador
+        self.view.vs_computer = not self.view.vs_computer
+        if self.view.vs_computer:
+            if self.engine is None:
+                self.engine = Engine.EngineController(
+                    time_limit=1.0, ponder=True, book_path=self.book_path, tablebase_dir=self.tablebase_dir
+                )
+            if self.game_started and self.is_engine_turn():
+                self.engine.start(self.model)
+        elif self.engine is not None:
+            self.engine.cancel()
+
+    def suggest_move(self):
+        # Sugiere una jugada al jugador: primero el libro y, si la posición no está, una búsqueda corta
+        if not self.game_started or self.view.game_over or self.is_engine_turn():
+            return
+        move = self.book.choose(self.model, best=True) if self.book is not None else None
+        if move is not None:
+            self.hint = (move[1], move[2], self.model.hash)
+            self.mark_dirty("board")
+            return
+        # Fuera del libro la búsqueda va a su propio proceso y poll_hint recoge el resultado
+        if self.hint_pending == self.model.hash:
+            return
+        if self.hint_engine is None:
+            self.hint_engine = Engine.EngineController(time_limit=HINT_TIME, tablebase_dir=self.tablebase_dir)
+        self.hint_engine.start(self.model)
+        self.hint_pending = self.model.hash
+
+    def poll_hint(self):
+        # Recoge la pista cuando termina la búsqueda; se descarta si la posición ya cambió
+        if self.hint_pending is None:
+            return
+        result = self.hint_engine.poll()
+        if result is None:
+            return
+        if result.move is not None and self.hint_pending == self.model.hash:
+            self.hint = (result.move[1], result.move[2], self.hint_pending)
+            self.mark_dirty("board")
+        self.hint_pending = None
+
+    def poll_engine(self):
+        # Recoge la jugada del ordenador si ya terminó de pensar; nunca bloquea el bucle principal.
+        # Mientras haya un mensaje en pantalla la jugada espera a que se cierre.
+        if self.engine is None or not self.is_engine_turn() or not self.game_started:
+            return
+        if self.view.game_over or self.view.has_overlay():
+            return
+        result = self.engine.poll()
+        if result is None or result.move is None:
+            return
+        if self.apply_move(*result.move):
+            # Mientras el jugador piensa, el motor medita sobre la respuesta que espera
+            expected = result.pv[1] if len(result.pv) > 1 else None
+            self.engine.ponder(self.model, expected)
+
+    def save_game(self, result):
+        # Añade la partida en curso al fichero PGN (una sola vez por partida)
+        if not self.pgn_path or not self.san_log:
+            return
+        computer = "Ordenador" if self.view.language == "es" else "Computer"
+        human = "Humano" if self.view.language == "es" else "Human"
+        headers = {
+            "Event": "Chess Game",
+            "Date": time.strftime("%Y.%m.%d"),
+            "White": computer if self.view.vs_computer and self.engine_color == "w" else human,
+            "Black": computer if self.view.vs_computer and self.engine_color == "b" else human,
+        }
+        Pgn.append_game(self.pgn_path, self.san_log, result, headers)
+        self.san_log = []
+
+    def close(self):
+        # Guarda la partida sin terminar y detiene el proceso del motor al cerrar el juego
+        self.save_game("*")
+        if self.book is not None:
+            self.book.close()
+            self.book = None
+        if self.engine is not None:
+            self.engine.close()
+            self.engine = None
+        if self.hint_engine is not None:
+            self.hint_engine.close()
+            self.hint_engine = None
+
+    def handle_resize(self):
+        # La ventana cambió de tamaño: la vista vuelve a escalar sus recursos
+        self.view.handle_resize()
+        self.mark_dirty()
+
+    def mark_dirty(self, region="all"):
+        self.dirty.add(region)
+
+    def close_settings(self):
+        if self.settings_open:
+            self.settings_open = False  # Cierra el panel de configuración
+            self.mark_dirty()
+
+    def needs_polling(self):
+        # True si hay algo pendiente (repintar o esperar al motor o a la pista) y el bucle no debe dormir
+        return (
+            bool(self.dirty)
+            or (self.engine is not None and self.engine.is_thinking())
+            or self.hint_pending is not None
+        )
+
     def scroll_moves(self, direction):
         # Permite hacer scroll en el registro de movimientos
         self.view.scroll_offset += direction
         self.view.scroll_offset = max(0, min(self.view.scroll_offset, self.view.max_scroll_offset))
+        self.mark_dirty("sidebar")
 
     def reset_game(self):
-        # Reinicia la partida
+        # Reinicia la partida (la anterior se guarda si quedó a medias)
+        self.save_game("*")
         self.model = m.Board()
-        self.piece_objects = self.load_piece_objects()
         self.current_turn = "w"
         self.selected_piece = None
         self.selected_pos = None
         self.move_log.clear()
         self.view.game_over = False
+        self.view.messages.clear()
+        self.pending_reset = False
         self.game_started = True
+        self.view.game_started = True
+        self.mark_dirty()
+        if self.hint_engine is not None:
+            self.hint_engine.cancel()
+        self.hint_pending = None
+        if self.engine is not None:
+            self.engine.cancel()
+            if self.is_engine_turn():
+                self.engine.start(self.model)
 
     def update(self):
+        # Redibuja solo si algo cambió desde el último fotograma
+        self.poll_engine()
+        self.poll_hint()
+        if not self.dirty:
+            return
+        hint = self.hint[:2] if self.hint and self.hint[2] == self.model.hash else None
         legal_moves = []
         if self.selected_piece and self.selected_pos and not self.view.game_over:
-            piece_obj = self.piece_objects.get(self.selected_piece)
-            if piece_obj:
-                legal_moves = piece_obj.get_moves(self.selected_pos, self.model)
+            legal_moves = self.legal_moves_from(self.selected_pos)
 
         if self.game_started:
-            self.view.update(self.model.current_positions, legal_moves, self.move_log, show_settings=self.settings_open)
+            self.view.update(self.model.current_positions, legal_moves, self.move_log,
+                             show_settings=self.settings_open, dirty=self.dirty, hint=hint)
         else:
-            self.view.update(self.model.initial_positions, show_settings=self.settings_open)
+            self.view.update(self.model.initial_positions, show_settings=self.settings_open, dirty=self.dirty)
+        self.dirty = set()
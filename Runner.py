@@ -0,0 +1,325 @@
+# Partidas sin interfaz gráfica entre dos políticas de juego (aleatoria o motor). No importa pygame, así
+# que funciona en servidores sin pantalla. Cada partida se escribe como una línea JSON en cuanto termina.
+# Uso: python Runner.py --games 1000 --white random --black engine:depth=2 --workers 4 --output partidas.jsonl
+import argparse
+import json
+import random
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import Engine
+import Model as m
+import Pgn
+import Tablebase
+
+RESULT_WHITE = "1-0"
+RESULT_BLACK = "0-1"
+RESULT_DRAW = "1/2-1/2"
+
+DEFAULT_MAX_PLIES = 300
+# Partidas que se envían juntas a cada proceso
+CHUNK_SIZE = 16
+
+
+class RandomPolicy:
+    # Elige una jugada legal al azar
+    def __init__(self, seed=None):
+        self.name = "random"
+        self.rng = random.Random(seed)
+
+    def new_game(self, seed=None):
+        if seed is not None:
+            self.rng.seed(seed)
+
+    def choose(self, board):
+        moves = board.legal_moves(board.turn)
+        return self.rng.choice(moves) if moves else None
+
+    def close(self):
+        pass
+
+
+class EnginePolicy:
+    # Juega la mejor jugada del motor con profundidad, tiempo o nodos fijos
+    def __init__(self, depth=None, time_limit=None, node_limit=None, hash_mb=16, book=None, tablebase=None):
+        self.name = "engine"
+        self.engine = Engine.Engine(
+            max_depth=depth or Engine.MAX_PLY,
+            time_limit=time_limit,
+            node_limit=node_limit,
+            hash_mb=hash_mb,
+            book=book,
+            tablebase=tablebase,
+        )
+
+    def new_game(self, seed=None):
+        # Cada partida empieza con la tabla vacía para que los resultados sean reproducibles
+        self.engine.table.clear()
+        if self.engine.book is not None and seed is not None:
+            self.engine.book.rng.seed(seed)
+
+    def choose(self, board):
+        return self.engine.search(board).move
+
+    def close(self):
+        self.engine.close()
+
+
+def make_policy(spec, seed=None):
+    # Crea una política a partir de un texto como "random", "engine:depth=3" o
+    # "engine:time=0.1,nodes=20000,book=libro.bin,tb=tablebases"
+    name, _, params = spec.partition(":")
+    options = {}
+    for item in filter(None, params.split(",")):
+        key, _, value = item.partition("=")
+        options[key.strip()] = value.strip()
+    if name == "random":
+        return RandomPolicy(seed)
+    if name == "engine":
+        policy = EnginePolicy(
+            depth=int(options["depth"]) if "depth" in options else None,
+            time_limit=float(options["time"]) if "time" in options else None,
+            node_limit=int(options["nodes"]) if "nodes" in options else None,
+            hash_mb=float(options.get("hash", 16)),
+            book=options.get("book"),
+            tablebase=options.get("tb"),
+        )
+        if "depth" not in options and "time" not in options and "nodes" not in options:
+            policy.engine.max_depth = 2  # sin límites la búsqueda no terminaría nunca
+        policy.name = spec
+        return policy
+    raise ValueError(f"Política desconocida: {spec}")
+
+
+def only_kings(board):
+    return all(not positions for key, positions in board.current_positions.items() if not key.startswith("king"))
+
+
+def tablebase_result(tablebase, board):
+    # Resultado teórico de la posición según las tablas de finales ("1-0", "0-1", "1/2-1/2") o None
+    probe = tablebase.probe(board)
+    if probe is None:
+        return None
+    outcome = probe[0]
+    if outcome == "draw":
+        return RESULT_DRAW
+    white_wins = (outcome == "win") == (board.turn == "w")
+    return RESULT_WHITE if white_wins else RESULT_BLACK
+
+
+def play_game(white, black, board=None, max_plies=DEFAULT_MAX_PLIES, tablebase=None):
+    # Juega una partida entre dos políticas y devuelve un diccionario con las jugadas, el resultado,
+    # el motivo del final y los tiempos. La partida termina por mate, ahogado, triple repetición,
+    # solo reyes en el tablero o al llegar a max_plies medias jugadas (tablas). Con tablebase (un
+    # Tablebase.Tablebase) también se adjudica en cuanto la posición está en las tablas de finales.
+    board = board or m.Board()
+    policies = {"w": white, "b": black}
+    think_time = {"w": 0.0, "b": 0.0}
+    moves = []
+    seen = {board.hash: 1}
+    start = time.perf_counter()
+    result = RESULT_DRAW
+    termination = "max_plies"
+
+    while len(moves) < max_plies:
+        color = board.turn
+        if not board.legal_moves(color):
+            if board.is_king_in_check(color):
+                result = RESULT_BLACK if color == "w" else RESULT_WHITE
+                termination = "checkmate"
+            else:
+                termination = "stalemate"
+            break
+        if only_kings(board):
+            termination = "insufficient_material"
+            break
+        if tablebase is not None:
+            adjudicated = tablebase_result(tablebase, board)
+            if adjudicated is not None:
+                result = adjudicated
+                termination = "tablebase"
+                break
+
+        move_start = time.perf_counter()
+        move = policies[color].choose(board)
+        think_time[color] += time.perf_counter() - move_start
+        piece_key, start_pos, end_pos = move
+        board.make_move(piece_key, start_pos, end_pos)
+        moves.append(f"{m.pos_to_notation(start_pos)}{m.pos_to_notation(end_pos)}")
+
+        seen[board.hash] = seen.get(board.hash, 0) + 1
+        if seen[board.hash] >= 3:
+            termination = "repetition"
+            break
+
+    return {
+        "white": white.name,
+        "black": black.name,
+        "result": result,
+        "termination": termination,
+        "plies": len(moves),
+        "moves": moves,
+        "time": {"white": round(think_time["w"], 4), "black": round(think_time["b"], 4)},
+        "elapsed": round(time.perf_counter() - start, 4),
+    }
+
+
+def record_to_pgn(record):
+    # Texto PGN de un registro de play_game (las jugadas origen-destino se pasan a SAN)
+    board = m.Board()
+    san_moves = []
+    for move in record["moves"]:
+        start = m.notation_to_pos(move[:2])
+        end = m.notation_to_pos(move[2:4])
+        full_move = (board.piece_at(start), start, end)
+        san_moves.append(Pgn.move_to_san(board, full_move))
+        board.make_move(*full_move)
+    headers = {
+        "Event": "Runner",
+        "Round": str(record.get("game", 0) + 1),
+        "White": record["white"],
+        "Black": record["black"],
+        "Termination": record["termination"],
+    }
+    return Pgn.game_to_pgn(san_moves, record["result"], headers)
+
+
+def _game_setup(index, alternate, seed):
+    # Colores y semilla de la partida index: con alternate las partidas impares cambian de color
+    swap = alternate and index % 2 == 1
+    game_seed = None if seed is None else seed + index
+    return swap, game_seed
+
+
+# Políticas y tablas de finales de cada proceso del grupo; se crean una vez y se reutilizan entre partidas
+_worker_policies = {}
+_worker_tablebases = {}
+
+
+def _worker_policy(spec):
+    if spec not in _worker_policies:
+        _worker_policies[spec] = make_policy(spec)
+    return _worker_policies[spec]
+
+
+def _worker_tablebase(directory):
+    if directory is None:
+        return None
+    if directory not in _worker_tablebases:
+        _worker_tablebases[directory] = Tablebase.Tablebase(directory)
+    return _worker_tablebases[directory]
+
+
+def _play_chunk(indices, white_spec, black_spec, alternate, seed, max_plies, tablebase_dir):
+    records = []
+    tablebase = _worker_tablebase(tablebase_dir)
+    for index in indices:
+        records.append(
+            _play_one(index, white_spec, black_spec, alternate, seed, max_plies, _worker_policy, tablebase)
+        )
+    return records
+
+
+def _play_one(index, white_spec, black_spec, alternate, seed, max_plies, get_policy, tablebase=None):
+    swap, game_seed = _game_setup(index, alternate, seed)
+    white = get_policy(black_spec if swap else white_spec)
+    black = get_policy(white_spec if swap else black_spec)
+    white.new_game(game_seed)
+    # Si las dos políticas son la misma instancia basta con reiniciarla una vez
+    if black is not white:
+        black.new_game(None if game_seed is None else game_seed + 1)
+    record = play_game(white, black, max_plies=max_plies, tablebase=tablebase)
+    record["game"] = index
+    record["seed"] = game_seed
+    return record
+
+
+def play_games(white_spec, black_spec, games, workers=1, max_plies=DEFAULT_MAX_PLIES, alternate=True, seed=None,
+               tablebase_dir=None):
+    # Generador que juega games partidas y va devolviendo cada registro en cuanto termina.
+    # Con workers > 1 las partidas se reparten en bloques entre procesos y el orden de llegada puede
+    # variar (cada registro lleva su número de partida en "game"). Con tablebase_dir las partidas se
+    # adjudican al llegar a un final de las tablas.
+    if workers <= 1:
+        policies = {}
+        tablebase = Tablebase.Tablebase(tablebase_dir) if tablebase_dir else None
+
+        def get_policy(spec):
+            if spec not in policies:
+                policies[spec] = make_policy(spec)
+            return policies[spec]
+
+        try:
+            for index in range(games):
+                yield _play_one(index, white_spec, black_spec, alternate, seed, max_plies, get_policy, tablebase)
+        finally:
+            for policy in policies.values():
+                policy.close()
+            if tablebase is not None:
+                tablebase.close()
+        return
+
+    chunks = (range(i, min(i + CHUNK_SIZE, games)) for i in range(0, games, CHUNK_SIZE))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        # Como mucho dos bloques en cola por proceso, para no crear millones de tareas de golpe
+        for chunk in chunks:
+            pending.add(
+                pool.submit(_play_chunk, chunk, white_spec, black_spec, alternate, seed, max_plies, tablebase_dir)
+            )
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        for future in pending:
+            yield from future.result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Partidas sin interfaz gráfica entre dos políticas")
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--white", default="random", help='política: "random" o "engine:depth=3,time=0.1,nodes=N"')
+    parser.add_argument("--black", default="random")
+    parser.add_argument("--workers", type=int, default=1, help="procesos en paralelo")
+    parser.add_argument("--max-plies", type=int, default=DEFAULT_MAX_PLIES)
+    parser.add_argument("--no-alternate", action="store_true", help="no cambia los colores entre partidas")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", default="-", help="fichero JSONL (por defecto la salida estándar)")
+    parser.add_argument("--pgn", default=None, help="fichero PGN en el que guardar también las partidas")
+    parser.add_argument("--tablebase", default=None, help="directorio de tablas de finales para adjudicar partidas")
+    args = parser.parse_args()
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    pgn = open(args.pgn, "w", encoding="utf-8") if args.pgn else None
+    totals = {RESULT_WHITE: 0, RESULT_BLACK: 0, RESULT_DRAW: 0}
+    start = time.perf_counter()
+    try:
+        for record in play_games(
+            args.white, args.black, args.games,
+            workers=args.workers,
+            max_plies=args.max_plies,
+            alternate=not args.no_alternate,
+            seed=args.seed,
+            tablebase_dir=args.tablebase,
+        ):
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            if pgn is not None:
+                pgn.write(record_to_pgn(record))
+            totals[record["result"]] += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if pgn is not None:
+            pgn.close()
+    elapsed = time.perf_counter() - start
+    print(
+        f"{args.games} games in {elapsed:.1f}s: "
+        f"1-0 {totals[RESULT_WHITE]}  0-1 {totals[RESULT_BLACK]}  1/2-1/2 {totals[RESULT_DRAW]}",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
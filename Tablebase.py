@@ -0,0 +1,264 @@
+# Tablas de finales para rey y pieza contra rey (KQK, KRK, KBK, KNK), resueltas por análisis retrógrado.
+# Cada tabla es un fichero de 2 * 64^3 bytes (uno por posición) que se consulta con mmap, así que
+# probar una posición es aritmética de índices. Los finales con peones no se generan: el modelo no tiene
+# coronación, así que KPK no se parece al ajedrez real. Uso:
+#   python Tablebase.py generate KQK KRK --workers 8
+#   python Tablebase.py probe --fen "8/8/8/4k3/8/8/8/4KQ2 w - - 0 1"
+import argparse
+import ctypes
+import mmap
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import sharedctypes
+
+import Model as m
+
+PIECES = {"Q": "queen", "R": "rook", "B": "bishop", "N": "knight"}
+DEFAULT_DIRECTORY = "tablebases"
+
+# Valor de cada posición, desde el punto de vista del bando que mueve:
+#   0 = tablas, n (1..127) = gana y da mate en n medias jugadas, 128 + n = pierde en n, 255 = no válida
+DRAW = 0
+LOSS = 128
+INVALID = 255
+TABLE_SIZE = 2 * 64 * 64 * 64
+
+KING_SETS = [set(targets) for targets in m.KING_TABLE]
+
+
+def position_index(stm, wk, bk, piece_sq):
+    # stm es 0 si mueve el bando fuerte (con la pieza) y 1 si mueve el rey solo
+    return stm << 18 | wk << 12 | bk << 6 | piece_sq
+
+
+def piece_targets(piece, sq, blockers):
+    # Casillas que ataca la pieza desde sq; los rayos se detienen en la primera casilla de blockers
+    if piece == "knight":
+        return m.KNIGHT_TABLE[sq]
+    targets = []
+    for diagonal, ray in m.RAY_TABLE[sq]:
+        if (piece == "bishop" and not diagonal) or (piece == "rook" and diagonal):
+            continue
+        for target in ray:
+            targets.append(target)
+            if target in blockers:
+                break
+    return targets
+
+
+def decode(value):
+    # Convierte el byte de la tabla en (resultado, medias_jugadas) o None si la posición no es válida
+    if value == INVALID:
+        return None
+    if value == DRAW:
+        return "draw", 0
+    if value < LOSS:
+        return "win", value
+    return "loss", value - LOSS
+
+
+# Estado de cada proceso del generador: la tabla compartida y la pieza del final
+_table = None
+_piece = None
+
+
+def _init_worker(buffer, piece):
+    global _table, _piece
+    _table = memoryview(buffer).cast("B")
+    _piece = piece
+
+
+def _weak_moves(wk, bk, piece_sq):
+    # Jugadas del rey solo: lista de casillas de destino y si puede capturar la pieza (tablas)
+    attacked = set(piece_targets(_piece, piece_sq, (wk,)))
+    moves = []
+    can_capture = False
+    for target in m.KING_TABLE[bk]:
+        if target == wk or target in KING_SETS[wk]:
+            continue
+        if target == piece_sq:
+            can_capture = True
+        elif target not in attacked:
+            moves.append(target)
+    return moves, can_capture, bk in attacked
+
+
+def _classify(wk_values):
+    # Marca las posiciones imposibles y los mates (pierde en 0) para los reyes blancos indicados.
+    # Devuelve los índices de los mates, que son la primera frontera del análisis.
+    mates = []
+    for wk in wk_values:
+        for bk in range(64):
+            for piece_sq in range(64):
+                if wk == bk or piece_sq == wk or piece_sq == bk or bk in KING_SETS[wk]:
+                    _table[position_index(0, wk, bk, piece_sq)] = INVALID
+                    _table[position_index(1, wk, bk, piece_sq)] = INVALID
+                    continue
+                moves, can_capture, in_check = _weak_moves(wk, bk, piece_sq)
+                # Con el bando fuerte al turno, el rey solo no puede estar en jaque
+                if in_check:
+                    _table[position_index(0, wk, bk, piece_sq)] = INVALID
+                if in_check and not moves and not can_capture:
+                    index = position_index(1, wk, bk, piece_sq)
+                    _table[index] = LOSS
+                    mates.append(index)
+    return mates
+
+
+def _expand(frontier, level):
+    # Un paso del análisis retrógrado. Para cada posición de la frontera (resuelta en level - 1) se
+    # generan sus predecesoras deshaciendo una jugada del bando contrario:
+    #  - si el rey solo pierde en level - 1, la predecesora (mueve el fuerte) gana en level
+    #  - si el fuerte gana en level - 1, la predecesora (mueve el rey solo) pierde en level si todas sus
+    #    jugadas llevan a posiciones ganadas
+    # Cada paso lee una mitad de la tabla y escribe la otra, así que los procesos no se pisan.
+    resolved = []
+    for index in frontier:
+        stm = index >> 18
+        wk = (index >> 12) & 63
+        bk = (index >> 6) & 63
+        piece_sq = index & 63
+        if stm == 1:
+            predecessors = [position_index(0, sq, bk, piece_sq) for sq in m.KING_TABLE[wk]]
+            predecessors += [
+                position_index(0, wk, bk, sq)
+                for sq in piece_targets(_piece, piece_sq, (wk, bk)) if sq != wk and sq != bk
+            ]
+            for previous in predecessors:
+                if _table[previous] == DRAW:
+                    _table[previous] = level
+                    resolved.append(previous)
+        else:
+            for sq in m.KING_TABLE[bk]:
+                previous = position_index(1, wk, sq, piece_sq)
+                if _table[previous] != DRAW:
+                    continue
+                moves, can_capture, _ = _weak_moves(wk, sq, piece_sq)
+                if can_capture or not moves:
+                    continue
+                if all(0 < _table[position_index(0, wk, target, piece_sq)] < LOSS for target in moves):
+                    _table[previous] = LOSS + level
+                    resolved.append(previous)
+    return resolved
+
+
+def _chunks(items, count):
+    size = max(1, -(-len(items) // count))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def generate(material, directory=DEFAULT_DIRECTORY, workers=None, verbose=False):
+    # Genera la tabla de material ("KQK", "KRK", "KBK" o "KNK") y la guarda en directory/<material>.tb.
+    # Cada nivel del análisis se reparte entre procesos que escriben en una tabla en memoria compartida.
+    material = material.upper()
+    if len(material) != 3 or material[0] != "K" or material[2] != "K" or material[1] not in PIECES:
+        raise ValueError(f"Material no admitido: {material} (solo rey y pieza contra rey, sin peones)")
+    piece = PIECES[material[1]]
+    workers = workers or os.cpu_count() or 1
+    buffer = sharedctypes.RawArray(ctypes.c_ubyte, TABLE_SIZE)
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(buffer, piece)) as pool:
+        frontier = []
+        for mates in pool.map(_classify, _chunks(list(range(64)), workers * 4)):
+            frontier.extend(mates)
+        level = 0
+        while frontier and level < LOSS - 1:
+            if verbose:
+                print(f"{material} level {level}: {len(frontier)} positions ({time.perf_counter() - start:.1f}s)")
+            level += 1
+            resolved = set()
+            for batch in pool.map(_expand, _chunks(frontier, workers * 4), [level] * (workers * 4)):
+                resolved.update(batch)
+            frontier = sorted(resolved)
+
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{material}.tb")
+    with open(path, "wb") as f:
+        f.write(bytes(buffer))
+    return path
+
+
+class Tablebase:
+    # Consulta de las tablas generadas. Los ficheros se abren (mmap) la primera vez que se necesitan.
+    def __init__(self, directory=DEFAULT_DIRECTORY):
+        self.directory = directory
+        self.tables = {}
+
+    def table(self, material):
+        if material not in self.tables:
+            path = os.path.join(self.directory, f"{material}.tb")
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    self.tables[material] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self.tables[material] = None
+        return self.tables[material]
+
+    def close(self):
+        for data in self.tables.values():
+            if data is not None:
+                data.close()
+        self.tables.clear()
+
+    def probe(self, board):
+        # Devuelve (resultado, medias_jugadas) para el bando que mueve, o None si no hay tabla para
+        # ese material. resultado es "win", "loss" o "draw".
+        strong = None
+        piece_sq = None
+        material = None
+        kings = {}
+        for piece_key, positions in board.current_positions.items():
+            if not positions:
+                continue
+            name, color = piece_key.split("_")
+            if name == "king":
+                kings[color] = positions[0]
+                continue
+            if strong is not None or len(positions) > 1 or name == "pawn":
+                return None
+            strong = color
+            piece_sq = positions[0]
+            material = "K" + next(letter for letter, piece in PIECES.items() if piece == name) + "K"
+        if strong is None or len(kings) != 2:
+            return None
+        data = self.table(material)
+        if data is None:
+            return None
+
+        weak = "b" if strong == "w" else "w"
+        squares = [pos[1] * 8 + pos[0] for pos in (kings[strong], kings[weak], piece_sq)]
+        # Las tablas se generan con el bando fuerte en blancas; si no, se refleja el tablero
+        if strong == "b":
+            squares = [sq ^ 56 for sq in squares]
+        stm = 0 if board.turn == strong else 1
+        return decode(data[position_index(stm, *squares)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tablas de finales de rey y pieza contra rey")
+    commands = parser.add_subparsers(dest="command", required=True)
+    gen = commands.add_parser("generate", help="genera tablas")
+    gen.add_argument("materials", nargs="+", help="KQK, KRK, KBK o KNK")
+    gen.add_argument("--workers", type=int, default=None)
+    gen.add_argument("--dir", default=DEFAULT_DIRECTORY)
+    probe = commands.add_parser("probe", help="consulta una posición")
+    probe.add_argument("--fen", required=True)
+    probe.add_argument("--dir", default=DEFAULT_DIRECTORY)
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        for material in args.materials:
+            start = time.perf_counter()
+            path = generate(material, args.dir, args.workers, verbose=True)
+            print(f"{material}: {path} ({time.perf_counter() - start:.1f}s)")
+    else:
+        tablebase = Tablebase(args.dir)
+        result = tablebase.probe(m.Board.from_fen(args.fen))
+        print("not in tablebase" if result is None else f"{result[0]} in {result[1]} plies")
+        tablebase.close()
+
+
+if __name__ == "__main__":
+    main()
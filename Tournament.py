@@ -0,0 +1,301 @@
+# Torneo entre dos configuraciones del motor repartido en un grupo de procesos. Cada apertura se juega dos
+# veces cambiando los colores; se calcula la diferencia de Elo con su intervalo de confianza y se puede parar
+# antes con un SPRT. Un motor con profundidad o nodos fijos juega siempre igual la misma posición, así que
+# cuando se acaban las aperturas se alargan con jugadas al azar (con semilla) hasta dar con una línea nueva;
+# si no, las partidas repetidas contarían como muestras independientes. Uso:
+#   python Tournament.py --engine-a engine:depth=3 --engine-b engine:depth=2 --games 400 --workers 8 --sprt 0 10
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import Model as m
+import Runner
+
+# Aperturas cortas (jugadas origen-destino) para que las partidas no se repitan. Solo usan jugadas que el
+# modelo admite (sin enroque, captura al paso ni coronación).
+OPENINGS = [
+    "e2e4 e7e5 g1f3 b8c6",
+    "e2e4 c7c5 g1f3 d7d6",
+    "e2e4 e7e6 d2d4 d7d5",
+    "e2e4 c7c6 d2d4 d7d5",
+    "d2d4 d7d5 c2c4 e7e6",
+    "d2d4 d7d5 c2c4 c7c6",
+    "d2d4 g8f6 c2c4 g7g6",
+    "d2d4 g8f6 c2c4 e7e6",
+    "c2c4 e7e5 b1c3 g8f6",
+    "g1f3 d7d5 g2g3 g8f6",
+    "e2e4 d7d5 e4d5 d8d5",
+    "d2d4 f7f5 g2g3 g8f6",
+]
+
+# Jugadas al azar que se añaden a una apertura cuando se vuelve a usar, e intentos para encontrar una línea
+# que no se haya jugado
+RANDOM_PLIES = 2
+MAX_ATTEMPTS = 100
+
+# Puntuación por resultado desde el punto de vista del motor A
+SCORES = {"win": 1.0, "draw": 0.5, "loss": 0.0}
+# Partidas ficticias que se suman a cada resultado antes de estimar media y varianza, para que con todo
+# victorias, todo derrotas o todo tablas la varianza no sea cero y la LLR y el intervalo sigan moviéndose
+PRIOR_GAMES = 0.5
+
+
+def apply_opening(board, opening):
+    # Juega sobre board las jugadas de la apertura ("e2e4 e7e5 ..."); falla si alguna no es legal
+    for move in opening.split():
+        start = m.notation_to_pos(move[:2])
+        end = m.notation_to_pos(move[2:4])
+        piece_key = board.piece_at(start)
+        if piece_key is None or end not in board.legal_moves_from(start) or piece_key[-1] != board.turn:
+            raise ValueError(f"Jugada ilegal en la apertura {opening!r}: {move}")
+        board.make_move(piece_key, start, end)
+    return board
+
+
+def extend_opening(opening, rng, plies=RANDOM_PLIES):
+    # Devuelve la apertura con plies jugadas legales más elegidas con rng (menos si la partida termina)
+    board = apply_opening(m.Board(), opening)
+    moves = opening.split()
+    for _ in range(plies):
+        legal = board.legal_moves(board.turn)
+        if not legal:
+            break
+        piece_key, start, end = rng.choice(legal)
+        board.make_move(piece_key, start, end)
+        moves.append(m.pos_to_notation(start) + m.pos_to_notation(end))
+    return " ".join(moves)
+
+
+def schedule(games, openings, seed=0):
+    # Genera (partida, apertura, a_juega_con_blancas). Cada pareja de partidas juega la misma línea con
+    # los dos colores; desde la segunda vuelta por openings la línea se alarga al azar y no se repite.
+    rng = random.Random(seed)
+    used = set()
+    opening = None
+    for index in range(games):
+        if index % 2 == 0:
+            round_index = index // 2
+            opening = openings[round_index % len(openings)]
+            if round_index >= len(openings):
+                base = opening
+                for attempt in range(MAX_ATTEMPTS):
+                    # Si las líneas cortas se agotan, se alargan un poco más
+                    opening = extend_opening(base, rng, RANDOM_PLIES + attempt // 10)
+                    if opening not in used:
+                        break
+            used.add(opening)
+        yield index, opening, index % 2 == 0
+
+
+def load_openings(path):
+    # Una apertura por línea; se ignoran las líneas vacías y las que empiezan por '#'
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def expected_score(elo):
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def score_to_elo(score):
+    # Diferencia de Elo que corresponde a una puntuación media (acotada para 0% y 100%)
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / score - 1)
+
+
+class Stats:
+    # Resultados acumulados del motor A frente al B
+    def __init__(self):
+        self.wins = 0
+        self.draws = 0
+        self.losses = 0
+
+    def add(self, outcome):
+        if outcome == "win":
+            self.wins += 1
+        elif outcome == "draw":
+            self.draws += 1
+        else:
+            self.losses += 1
+
+    @property
+    def games(self):
+        return self.wins + self.draws + self.losses
+
+    def score(self):
+        return (self.wins + 0.5 * self.draws) / self.games if self.games else 0.5
+
+    def estimate(self):
+        # Devuelve (partidas, media, varianza por partida) del modelo trinomial, con PRIOR_GAMES sumadas
+        # a cada resultado
+        wins = self.wins + PRIOR_GAMES
+        draws = self.draws + PRIOR_GAMES
+        losses = self.losses + PRIOR_GAMES
+        games = wins + draws + losses
+        mean = (wins + 0.5 * draws) / games
+        total = wins * (1 - mean) ** 2 + draws * (0.5 - mean) ** 2 + losses * mean ** 2
+        return games, mean, total / games
+
+    def variance(self):
+        return self.estimate()[2]
+
+    def elo(self, z=1.96):
+        # Devuelve (elo, límite_inferior, límite_superior) con un intervalo de confianza normal
+        if not self.games:
+            return 0.0, -math.inf, math.inf
+        games, mean, variance = self.estimate()
+        margin = z * math.sqrt(variance / games)
+        return score_to_elo(mean), score_to_elo(mean - margin), score_to_elo(mean + margin)
+
+    def llr(self, elo0, elo1):
+        # Razón de verosimilitud logarítmica del SPRT (aproximación normal) entre H0: elo0 y H1: elo1
+        if not self.games:
+            return 0.0
+        games, mean, variance = self.estimate()
+        s0 = expected_score(elo0)
+        s1 = expected_score(elo1)
+        return (s1 - s0) * (2 * mean - s0 - s1) * games / (2 * variance)
+
+    def __str__(self):
+        elo, low, high = self.elo()
+        return (f"games {self.games}  +{self.wins} ={self.draws} -{self.losses}  score {self.score():.3f}  "
+                f"elo {elo:+.1f} [{low:+.1f}, {high:+.1f}]")
+
+
+def sprt_bounds(alpha, beta):
+    # Límites de la LLR: por debajo se acepta H0, por encima H1
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+
+# Políticas de cada proceso del grupo; se crean una vez y se reutilizan entre partidas
+_worker_policies = {}
+
+
+def _worker_policy(spec):
+    if spec not in _worker_policies:
+        _worker_policies[spec] = Runner.make_policy(spec)
+    return _worker_policies[spec]
+
+
+def _play_pairing(index, spec_a, spec_b, opening, a_is_white, max_plies):
+    # Juega una partida del torneo y devuelve su registro con el resultado visto desde el motor A
+    policy_a = _worker_policy(spec_a)
+    policy_b = _worker_policy(spec_b)
+    policy_a.new_game()
+    policy_b.new_game()
+    white, black = (policy_a, policy_b) if a_is_white else (policy_b, policy_a)
+    board = apply_opening(m.Board(), opening)
+    record = Runner.play_game(white, black, board=board, max_plies=max_plies)
+    if record["result"] == Runner.RESULT_DRAW:
+        outcome = "draw"
+    elif (record["result"] == Runner.RESULT_WHITE) == a_is_white:
+        outcome = "win"
+    else:
+        outcome = "loss"
+    record.update(game=index, opening=opening, engine_a_white=a_is_white, outcome=outcome)
+    return record
+
+
+def run_tournament(spec_a, spec_b, games, openings=None, workers=None, max_plies=Runner.DEFAULT_MAX_PLIES,
+                   sprt=None, alpha=0.05, beta=0.05, on_game=None, seed=0):
+    # Juega hasta games partidas (por parejas: cada apertura con los dos colores) y devuelve
+    # (Stats, decisión_sprt). sprt es (elo0, elo1) o None; la decisión es "H0", "H1" o None.
+    # on_game(record, stats) se llama cada vez que termina una partida. seed fija las jugadas al azar
+    # que alargan las aperturas repetidas (ver schedule).
+    openings = openings or OPENINGS
+    workers = workers or os.cpu_count() or 1
+    stats = Stats()
+    decision = None
+    lower, upper = sprt_bounds(alpha, beta) if sprt else (None, None)
+
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        pending = set()
+        jobs = schedule(games, openings, seed)
+        while True:
+            # Como mucho dos partidas en cola por proceso
+            for index, opening, a_is_white in jobs:
+                pending.add(pool.submit(_play_pairing, index, spec_a, spec_b, opening, a_is_white, max_plies))
+                if len(pending) >= workers * 2:
+                    break
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                record = future.result()
+                stats.add(record["outcome"])
+                if on_game is not None:
+                    on_game(record, stats)
+            if sprt:
+                llr = stats.llr(*sprt)
+                if llr <= lower:
+                    decision = "H0"
+                elif llr >= upper:
+                    decision = "H1"
+                if decision:
+                    break
+    finally:
+        pool.shutdown(cancel_futures=True)
+    return stats, decision
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Torneo entre dos configuraciones del motor")
+    parser.add_argument("--engine-a", default="engine:depth=3", help="política del motor A (ver Runner.py)")
+    parser.add_argument("--engine-b", default="engine:depth=2", help="política del motor B")
+    parser.add_argument("--games", type=int, default=100, help="número máximo de partidas")
+    parser.add_argument("--workers", type=int, default=None, help="procesos (por defecto, uno por núcleo)")
+    parser.add_argument("--openings", default=None, help="fichero con una apertura por línea")
+    parser.add_argument("--max-plies", type=int, default=Runner.DEFAULT_MAX_PLIES)
+    parser.add_argument("--sprt", type=float, nargs=2, metavar=("ELO0", "ELO1"), default=None,
+                        help="para en cuanto el SPRT acepte H0 (elo0) o H1 (elo1)")
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--beta", type=float, default=0.05)
+    parser.add_argument("--output", default=None, help="fichero JSONL con las partidas")
+    parser.add_argument("--seed", type=int, default=0, help="semilla de las jugadas que alargan las aperturas")
+    args = parser.parse_args()
+
+    openings = load_openings(args.openings) if args.openings else OPENINGS
+    out = open(args.output, "w", encoding="utf-8") if args.output else None
+    start = time.perf_counter()
+
+    def on_game(record, stats):
+        if out is not None:
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+        line = str(stats)
+        if args.sprt:
+            line += f"  llr {stats.llr(*args.sprt):+.2f}"
+        print(line, file=sys.stderr)
+
+    try:
+        stats, decision = run_tournament(
+            args.engine_a, args.engine_b, args.games,
+            openings=openings,
+            workers=args.workers,
+            max_plies=args.max_plies,
+            sprt=args.sprt,
+            alpha=args.alpha,
+            beta=args.beta,
+            on_game=on_game,
+            seed=args.seed,
+        )
+    finally:
+        if out is not None:
+            out.close()
+
+    print(f"{args.engine_a} vs {args.engine_b}: {stats}  ({time.perf_counter() - start:.1f}s)")
+    if args.sprt:
+        lower, upper = sprt_bounds(args.alpha, args.beta)
+        verdict = decision or "inconclusive"
+        print(f"SPRT elo0={args.sprt[0]} elo1={args.sprt[1]}: llr {stats.llr(*args.sprt):+.2f} "
+              f"[{lower:+.2f}, {upper:+.2f}] -> {verdict}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# Tabla de transposición de tamaño fijo para el motor de búsqueda. Se reserva de una vez como un bloque
+# de enteros de 64 bits (no un dict de objetos), así que la memoria no crece durante la sesión.
+# Cada cubo tiene dos entradas: una que prefiere profundidad y otra que siempre se reemplaza.
+# El bloque puede ser memoria compartida entre procesos; por eso la clave se guarda como clave XOR datos
+# y una entrada escrita a medias por otro proceso simplemente no coincide al leerla.
+import ctypes
+from multiprocessing import sharedctypes
+
+# Tipos de cota guardados con cada puntuación
+EXACT = 1
+LOWER = 2
+UPPER = 3
+
+ENTRY_BYTES = 16  # clave (8 bytes) + datos empaquetados (8 bytes)
+BUCKET_ENTRIES = 2
+SLOTS_PER_BUCKET = BUCKET_ENTRIES * 2
+
+# Distribución de bits de los datos empaquetados
+MOVE_BITS = 13  # origen (6) + destino (6) + bit de jugada presente
+DEPTH_SHIFT = 13
+BOUND_SHIFT = 21
+SCORE_SHIFT = 23
+GENERATION_SHIFT = 55
+SCORE_OFFSET = 1 << 31
+
+
+def pack(depth, score, bound, move, generation):
+    # move es (índice_origen, índice_destino) o None
+    move_bits = 0 if move is None else (1 << 12) | (move[0] << 6) | move[1]
+    return (
+        move_bits
+        | (depth & 0xFF) << DEPTH_SHIFT
+        | bound << BOUND_SHIFT
+        | (score + SCORE_OFFSET) << SCORE_SHIFT
+        | (generation & 0xFF) << GENERATION_SHIFT
+    )
+
+
+def unpack(data):
+    # Devuelve (profundidad, puntuación, cota, jugada)
+    move = None
+    if data & (1 << 12):
+        move = ((data >> 6) & 63, data & 63)
+    depth = (data >> DEPTH_SHIFT) & 0xFF
+    bound = (data >> BOUND_SHIFT) & 3
+    score = ((data >> SCORE_SHIFT) & 0xFFFFFFFF) - SCORE_OFFSET
+    return depth, score, bound, move
+
+
+def table_bytes(size_mb):
+    # Bytes que ocupa una tabla de size_mb megabytes (redondeado a cubos completos)
+    bucket_bytes = ENTRY_BYTES * BUCKET_ENTRIES
+    return max(1, int(size_mb * 1024 * 1024) // bucket_bytes) * bucket_bytes
+
+
+def shared_buffer(size_mb):
+    # Bloque de memoria compartida para una tabla de size_mb megabytes. Se puede pasar a los procesos
+    # hijos al crearlos (por ejemplo en el initializer de un ProcessPoolExecutor).
+    return sharedctypes.RawArray(ctypes.c_uint64, table_bytes(size_mb) // 8)
+
+
+class TranspositionTable:
+    def __init__(self, size_mb=16, buffer=None):
+        # size_mb es el presupuesto de memoria en megabytes; buffer permite usar un bloque ya
+        # reservado (por ejemplo el de shared_buffer) en lugar de uno propio
+        size = table_bytes(size_mb)
+        self.num_buckets = size // (ENTRY_BYTES * BUCKET_ENTRIES)
+        self.buffer = buffer if buffer is not None else bytearray(size)
+        self.slots = memoryview(self.buffer).cast("B").cast("Q")
+        self.generation = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        # Contadores para ajustar el tamaño de la tabla
+        self.probes = 0
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0  # fallos con el cubo ocupado por otras posiciones
+        self.stores = 0
+
+    def clear(self):
+        self.slots[:] = memoryview(bytes(len(self.slots) * 8)).cast("Q")
+        self.generation = 0
+        self.reset_stats()
+
+    def new_search(self):
+        # Las entradas de búsquedas anteriores pasan a poder reemplazarse en la entrada de profundidad
+        self.generation = (self.generation + 1) & 0xFF
+
+    def probe(self, key):
+        # Devuelve (profundidad, puntuación, cota, jugada) o None si la posición no está
+        self.probes += 1
+        slots = self.slots
+        base = (key % self.num_buckets) * SLOTS_PER_BUCKET
+        for offset in (0, 2):
+            data = slots[base + offset + 1]
+            if data and slots[base + offset] ^ data == key:
+                self.hits += 1
+                return unpack(data)
+        if slots[base + 1] or slots[base + 3]:
+            self.collisions += 1
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, score, bound, move=None):
+        # Guarda una entrada; la de profundidad solo se sustituye por una búsqueda igual o más profunda,
+        # por la misma posición o si es de una búsqueda anterior. Si no, va a la de reemplazo siempre.
+        self.stores += 1
+        slots = self.slots
+        base = (key % self.num_buckets) * SLOTS_PER_BUCKET
+        data = pack(depth, score, bound, move, self.generation)
+        old = slots[base + 1]
+        if (
+            not old
+            or slots[base] ^ old == key
+            or depth >= (old >> DEPTH_SHIFT) & 0xFF
+            or (old >> GENERATION_SHIFT) & 0xFF != self.generation
+        ):
+            slots[base] = key ^ data
+            slots[base + 1] = data
+        else:
+            slots[base + 2] = key ^ data
+            slots[base + 3] = data
+
+    def usage(self):
+        # Fracción de entradas ocupadas, estimada sobre los primeros cubos
+        sample = min(self.num_buckets, 1000) * SLOTS_PER_BUCKET
+        used = sum(1 for i in range(1, sample, 2) if self.slots[i])
+        return used / (sample // 2)
+
+    def stats(self):
+        return {
+            "size_mb": len(self.slots) * 8 / (1024 * 1024),
+            "entries": self.num_buckets * BUCKET_ENTRIES,
+            "probes": self.probes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "collisions": self.collisions,
+            "stores": self.stores,
+            "usage": self.usage(),
+        }
@@ -2,32 +2,192 @@
 
 import pygame
 import os
+from collections import OrderedDict
 
 BLACK = (48, 46, 43)
 WHITE = (255, 255, 255)
 LIGHT = (237, 237, 237)
 DARK = (137, 169, 103)
 TEXT_COLOR = (230, 230, 230)
+HINT_COLOR = (246, 200, 60)
+
+class AssetCache:
+    # Carga cada imagen una sola vez y guarda sus versiones ya escaladas, con clave (recurso, tamaño, tema).
+    # Se vacía al redimensionar la ventana o cambiar de tema.
+    def __init__(self):
+        self.images = {}
+        self.surfaces = {}
+
+    def load(self, path):
+        # Imagen original, leída del disco solo la primera vez
+        if path not in self.images:
+            self.images[path] = pygame.image.load(path).convert_alpha()
+        return self.images[path]
+
+    def get(self, key, build):
+        # Devuelve la superficie guardada para key o la crea con build()
+        surface = self.surfaces.get(key)
+        if surface is None and key not in self.surfaces:
+            surface = build()
+            self.surfaces[key] = surface
+        return surface
+
+    def invalidate(self):
+        self.surfaces.clear()
+
+
+class TextCache:
+    # Registro de fuentes por (familia, tamaño, negrita) y caché LRU acotada de textos ya renderizados
+    # por (texto, fuente, color). SysFont y render son caros para hacerlos en cada fotograma.
+    def __init__(self, max_entries=256):
+        self.fonts = {}
+        self.texts = OrderedDict()
+        self.max_entries = max_entries
+
+    def font(self, size, bold=False, family="Arial"):
+        key = (family, size, bold)
+        font = self.fonts.get(key)
+        if font is None:
+            font = pygame.font.SysFont(family, size, bold=bold)
+            self.fonts[key] = font
+        return font
+
+    def render(self, text, size, color, bold=False, family="Arial"):
+        key = (text, family, size, bold, color)
+        surface = self.texts.get(key)
+        if surface is not None:
+            self.texts.move_to_end(key)
+            return surface
+        surface = self.font(size, bold, family).render(text, True, color)
+        self.texts[key] = surface
+        if len(self.texts) > self.max_entries:
+            self.texts.popitem(last=False)
+        return surface
+
+
+# Claves de las opciones del panel de ajustes, en el orden en que se dibujan
+SETTINGS_KEYS = ["toggle_language", "toggle_sound", "toggle_theme", "toggle_opponent", "show_help"]
+
+
+class Layout:
+    # Geometría de la ventana: tablero, barra lateral, botones y paneles. Se calcula una sola vez por
+    # tamaño de ventana (al crearla y en cada VIDEORESIZE) y la comparten la vista y el presentador.
+    def __init__(self, size, b_size=0.9):
+        self.b_size = b_size
+        self.b_margin = (1 - b_size) / 2
+        self.update(size)
+
+    def update(self, size):
+        w, h = size
+        self.width = w
+        self.height = h
+        self.corner_radius = round(h * 0.01)
+
+        # Tablero
+        self.margin = h * self.b_margin
+        self.board_size = h * self.b_size
+        self.square_size = self.board_size / 8
+
+        # Barra lateral (solo se dibuja si queda sitio suficiente)
+        self.sidebar_x = h * (3 * self.b_margin + self.b_size)
+        self.sidebar_y = self.margin
+        self.sidebar_width = w * 0.975 - self.sidebar_x
+        self.sidebar_height = self.board_size
+        self.show_sidebar = self.sidebar_width > h * 0.1
+        self.title_font_size = min(int(self.sidebar_height * 0.15), int(self.sidebar_width * 0.12))
+
+        # Botones de Play, Settings y pista, sin el efecto de empuje
+        b_dim = h * 0.08
+        b_posx = self.sidebar_x - h * 0.0875
+        b_posy_up = h * 0.42
+        b_posy_down = b_posy_up + b_dim + h * 0.045
+        self.start_button = pygame.Rect(b_posx, b_posy_up, b_dim, b_dim)
+        self.settings_button = pygame.Rect(b_posx, b_posy_down, b_dim, b_dim)
+        self.hint_button = pygame.Rect(b_posx, b_posy_down + b_dim + h * 0.045, b_dim, b_dim)
+
+        # Zonas que se repintan por separado: tablero (con coordenadas) y barra lateral (con botones)
+        board_right = int(self.margin + self.board_size) + 1
+        self.board_region = pygame.Rect(0, 0, board_right, h)
+        self.sidebar_region = pygame.Rect(board_right, 0, w - board_right, h)
+
+        # Panel de ajustes y sus botones
+        panel_width = w * 0.5
+        panel_height = h * 0.7
+        self.settings_panel = pygame.Rect((w - panel_width) // 2, (h - panel_height) // 2, panel_width, panel_height)
+        button_width = panel_width * 0.8
+        button_height = 45
+        spacing = 15
+        start_y = self.settings_panel.y + 40
+        self.settings_buttons = {}
+        for i, key in enumerate(SETTINGS_KEYS):
+            btn_y = start_y + i * (button_height + spacing)
+            self.settings_buttons[key] = pygame.Rect((w - button_width) // 2, btn_y, button_width, button_height)
+        close_y = start_y + len(SETTINGS_KEYS) * (button_height + spacing) + 10
+        self.settings_buttons["close_settings"] = pygame.Rect((w - button_width) // 2, close_y, button_width, button_height)
+
+        # Ventana de mensajes
+        panel_width = w * 0.5
+        panel_height = h * 0.2
+        self.message_panel = pygame.Rect((w - panel_width) // 2, (h - panel_height) // 2, panel_width, panel_height)
+        self.message_close = pygame.Rect(
+            w // 2 - 60,
+            self.message_panel.y + panel_height - 40 - 10,
+            120,
+            40
+        )
+
+        # Ventana de ayuda
+        panel_width = w * 0.6
+        panel_height = h * 0.5
+        self.help_panel = pygame.Rect((w - panel_width) // 2, (h - panel_height) // 2, panel_width, panel_height)
+        self.help_close = pygame.Rect(
+            self.help_panel.x + (panel_width - 100) // 2,
+            self.help_panel.y + panel_height - 60,
+            100,
+            40
+        )
+
+    def square_at(self, pos):
+        # Convierte una posición de la ventana en una celda (col, row) del tablero, o None
+        x, y = pos
+        col = int((x - self.margin) // self.square_size)
+        row = int((y - self.margin) // self.square_size)
+        if 0 <= col < 8 and 0 <= row < 8:
+            return (col, row)
+        return None
+
+    def square_origin(self, col, row):
+        # Esquina superior izquierda de una celda en la ventana
+        return (col * self.square_size + self.margin, row * self.square_size + self.margin)
+
 
 class Interface:
     def __init__(self, win):
         self.win = win
-        self.b_size = 0.9
-        self.b_margin = (1 - self.b_size) / 2
+        # Geometría compartida con el presentador; solo se recalcula al redimensionar
+        self.layout = Layout(win.get_size())
 
         # Fuentes para botones y texto de movimientos
         self.movestext_x = 0.2
         self.movestext_y = 0.3
 
-        self.font_button = pygame.font.SysFont("Arial", 28, bold=True)
-        self.font_move = pygame.font.SysFont("Arial", 18)
+        self.text_cache = TextCache()
         # Estados de botones y juego
         self.start_button_rect = None
         self.settings_button_rect = None
+        self.hint_button_rect = None
         self.start_pressed = False
         self.settings_pressed = False
+        # Hay una partida en curso (lo fija el presentador); start_pressed solo es el aspecto del botón
+        self.game_started = False
 
         self.game_over = False
+        # Ventanas superpuestas: mensajes pendientes (se muestran de uno en uno) y ayuda. Se dibujan en
+        # update() y se cierran con clics que llegan por el bucle de eventos normal.
+        self.messages = []
+        self.help_open = False
+        # Superficies escaladas que se reutilizan entre fotogramas
+        self.assets = AssetCache()
         # Carga de imágenes de piezas
         self.piece_images = {}
         self.load_piece_images()
@@ -35,7 +195,7 @@ class Interface:
         self.sound_on = True
         self.dark_theme = False
         self.language = "en"
-        self.settings_buttons = {}
+        self.vs_computer = False
         # Sonidos
         pygame.mixer.init()
         self.move_sound = pygame.mixer.Sound("sounds/piecemove.wav")
@@ -57,85 +217,97 @@ class Interface:
 
     def draw_board(self):
         # Dibuja el fondo del tablero
-        h = self.win.get_size()[1]
-        b_pos = h * self.b_margin
-        b_size = h * self.b_size
+        layout = self.layout
+        board = self.assets.get(("board", layout.board_size, self.dark_theme), self.build_board)
+        self.win.blit(board, (layout.margin, layout.margin))
+
+    def build_board(self):
         board_path = "images/board_dark.png" if self.dark_theme else "images/board_light.png"
-        board_img = pygame.image.load(board_path).convert_alpha()
-        board = pygame.transform.scale(board_img, (b_size, b_size))
-        self.round_corners(board, round(h * 0.01))
-        self.win.blit(board, (b_pos, b_pos))
+        b_size = self.layout.board_size
+        board = pygame.transform.scale(self.assets.load(board_path), (b_size, b_size))
+        self.round_corners(board, self.layout.corner_radius)
+        return board
+
+    def toggle_theme(self):
+        self.dark_theme = not self.dark_theme
+        self.assets.invalidate()
+
+    def handle_resize(self):
+        # Las superficies escaladas y la geometría dependen del tamaño de la ventana
+        self.layout.update(self.win.get_size())
+        self.assets.invalidate()
 
     def draw_pieces(self, positions):
         # Dibuja todas las piezas en sus posiciones actuales
-        h = self.win.get_size()[1]
-        margin = h * self.b_margin
-        square_size = h * self.b_size / 8
-
+        square_size = self.layout.square_size
         for piece, pos_list in positions.items():
             image = self.piece_images.get(piece)
-            if image:
+            if image and pos_list:
+                scaled = self.assets.get(
+                    (piece, square_size),
+                    lambda: pygame.transform.smoothscale(image, (square_size, square_size)),
+                )
                 for col, row in pos_list:
-                    x = col * square_size + margin
-                    y = row * square_size + margin
-                    scaled = pygame.transform.smoothscale(image, (square_size, square_size))
-                    self.win.blit(scaled, (x, y))
+                    self.win.blit(scaled, self.layout.square_origin(col, row))
 
     def draw_sidebar(self):
         # Dibuja la barra lateral con el título, botones y espacio para movimientos
-        h = self.win.get_size()[1]
-        w = self.win.get_size()[0]
-        sdb_posx = h * (3 * self.b_margin + self.b_size)
-        sdb_dimx = w * 0.975 - sdb_posx
-        sdb_dimy = h * self.b_size
-        sdb_posy = h * self.b_margin
-
-        if sdb_dimx > h * 0.1:
-            sidebar = pygame.Surface((sdb_dimx, sdb_dimy), pygame.SRCALPHA)
-            sidebar.fill((0, 0, 0, int(256 * 0.4)))
-            self.round_corners(sidebar, round(h * 0.01))
+        layout = self.layout
+        sdb_posx = layout.sidebar_x
+        sdb_dimx = layout.sidebar_width
+        sdb_dimy = layout.sidebar_height
+        sdb_posy = layout.sidebar_y
+
+        if layout.show_sidebar:
+            sidebar = self.assets.get(("sidebar", sdb_dimx, sdb_dimy), self.build_sidebar)
             self.win.blit(sidebar, (sdb_posx, sdb_posy))
 
-            font_size = min(int(sdb_dimy * 0.15), int(sdb_dimx * 0.12))
-            dynamic_font = pygame.font.SysFont("Arial", font_size, bold=True)
+            font_size = layout.title_font_size
             # Texto dinámico
             if self.language == "es":
                 lines = ["AJEDREZ"] if self.start_pressed else ["JUGUEMOS", "A", "AJEDREZ"]
             else:
                 lines = ["CHESS"] if self.start_pressed else ["LET'S", "PLAY", "CHESS"]
             for i, line in enumerate(lines):
-                text = dynamic_font.render(line, True, WHITE)
+                text = self.text_cache.render(line, font_size, WHITE, bold=True)
                 rect = text.get_rect(center=(sdb_posx + sdb_dimx / 2, sdb_posy + sdb_dimy * 0.1 + i * font_size))
                 self.win.blit(text, rect)
 
-            self.draw_buttons(sdb_posx)
+            self.draw_buttons()
             return sdb_posx, sdb_dimx, sdb_posy, sdb_dimy
 
-    def draw_buttons(self, sdb_posx):
-        # Dibuja los botones de Play y Settings con efecto de clic
-        h = self.win.get_size()[1]
-        b_dim = h * 0.08
-        b_posx = sdb_posx - h * 0.0875
-        b_posy_up = h * 0.42
-        b_posy_down = b_posy_up + b_dim + h * 0.045
+    def build_sidebar(self):
+        layout = self.layout
+        sidebar = pygame.Surface((layout.sidebar_width, layout.sidebar_height), pygame.SRCALPHA)
+        sidebar.fill((0, 0, 0, int(256 * 0.4)))
+        self.round_corners(sidebar, layout.corner_radius)
+        return sidebar
 
+    def draw_buttons(self):
+        # Dibuja los botones de Play y Settings con efecto de clic
         offset = 3  # efecto de empuje
         start_offset = offset if self.start_pressed else 0
         settings_offset = offset if self.settings_pressed else 0
 
-        self.start_button_rect = pygame.Rect(b_posx, b_posy_up + start_offset, b_dim, b_dim)
-        self.settings_button_rect = pygame.Rect(b_posx, b_posy_down + settings_offset, b_dim, b_dim)
+        self.start_button_rect = self.layout.start_button.move(0, start_offset)
+        self.settings_button_rect = self.layout.settings_button.move(0, settings_offset)
+        self.hint_button_rect = self.layout.hint_button
 
         self.create_button(self.start_button_rect, "", self.start_pressed)
         self.create_button(self.settings_button_rect, "", self.settings_pressed)
         self.draw_play_icon(self.start_button_rect)
         self.draw_settings_text(self.settings_button_rect)
+        # Botón de pista (sugerir jugada), solo durante la partida
+        if self.game_started:
+            self.create_button(self.hint_button_rect, "", False)
+            text = self.text_cache.render("?", int(self.hint_button_rect.height * 0.5), WHITE, bold=True)
+            self.win.blit(text, text.get_rect(center=self.hint_button_rect.center))
 
     def create_button(self, rect, text, is_pressed):
         color = BLACK if is_pressed else DARK
         pygame.draw.rect(self.win, color, rect, border_radius=8)
         if text:
-            text_surface = self.font_button.render(text, True, BLACK)
+            text_surface = self.text_cache.render(text, 28, BLACK, bold=True)
             text_rect = text_surface.get_rect(center=rect.center)
             self.win.blit(text_surface, text_rect)
 
@@ -149,19 +321,25 @@ class Interface:
 
     def draw_settings_text(self, rect):
         # Dibuja el icono de ajustes
-        icon_path = os.path.join("images", "settings.png")
-        try:
-            icon = pygame.image.load(icon_path).convert_alpha()
-            icon = pygame.transform.smoothscale(icon, (rect.width - 8, rect.height - 8))
+        icon = self.assets.get(("settings_icon", rect.width, rect.height), lambda: self.build_settings_icon(rect))
+        if icon is not None:
             self.win.blit(icon, (rect.x + 4, rect.y + 4))
-        except pygame.error:
+        else:
             font_size = int(rect.height * 0.4)
-            font = pygame.font.SysFont("Arial", font_size, bold=True)
             fallback_text = "⚙"
-            text = font.render(fallback_text, True, WHITE)
+            text = self.text_cache.render(fallback_text, font_size, WHITE, bold=True)
             text_rect = text.get_rect(center=rect.center)
             self.win.blit(text, text_rect)
 
+    def build_settings_icon(self, rect):
+        # Devuelve None si no se puede cargar la imagen (se dibuja el texto de respaldo)
+        icon_path = os.path.join("images", "settings.png")
+        try:
+            icon = self.assets.load(icon_path)
+        except pygame.error:
+            return None
+        return pygame.transform.smoothscale(icon, (rect.width - 8, rect.height - 8))
+
     def round_corners(self, img, r):
         # Redondea las esquinas de una superficie
         mask = pygame.Surface(img.get_size(), pygame.SRCALPHA)
@@ -173,21 +351,33 @@ class Interface:
         if not legal_moves:
             return
 
-        h = self.win.get_size()[1]
-        margin = h * self.b_margin
-        square_size = h * self.b_size / 8
-
+        square_size = self.layout.square_size
+        overlay = self.assets.get(("move_dot", square_size), lambda: self.build_move_dot(square_size))
         for col, row in legal_moves:
-            overlay = pygame.Surface((int(square_size), int(square_size)), pygame.SRCALPHA)
-            pygame.draw.circle(overlay, (48, 46, 43, 180), (square_size // 2, square_size // 2), int(square_size * 0.15))
-            self.win.blit(overlay, (int(margin + col * square_size), int(margin + row * square_size)))
+            x, y = self.layout.square_origin(col, row)
+            self.win.blit(overlay, (int(x), int(y)))
+
+    def draw_hint(self, hint):
+        # Marca el origen y el destino de la jugada sugerida
+        square_size = self.layout.square_size
+        for col, row in hint:
+            x, y = self.layout.square_origin(col, row)
+            pygame.draw.rect(self.win, HINT_COLOR, (x, y, square_size, square_size), width=max(2, int(square_size * 0.06)))
+
+    def build_move_dot(self, square_size):
+        overlay = pygame.Surface((int(square_size), int(square_size)), pygame.SRCALPHA)
+        pygame.draw.circle(overlay, (48, 46, 43, 180), (square_size // 2, square_size // 2), int(square_size * 0.15))
+        return overlay
 
     def display_message(self, message, color, font_size=36):
-        w, h = self.win.get_size()
-        panel_width = w * 0.5
-        panel_height = h * 0.2
-        panel_x = (w - panel_width) // 2
-        panel_y = (h - panel_height) // 2
+        # Añade un mensaje a la cola; se dibuja encima de todo hasta que se pulse "Cerrar"
+        self.messages.append((message, color, font_size))
+
+    def draw_message(self, message, color, font_size):
+        w, h = self.layout.width, self.layout.height
+        panel_rect = self.layout.message_panel
+        panel_width, panel_height = panel_rect.size
+        panel_x, panel_y = panel_rect.topleft
 
         overlay = pygame.Surface((w, h), pygame.SRCALPHA)
         overlay.fill((0, 0, 0, 120))
@@ -198,39 +388,18 @@ class Interface:
         self.round_corners(panel, 12)
         self.win.blit(panel, (panel_x, panel_y))
 
-        font = pygame.font.SysFont("Arial", font_size, bold=True)
-        text = font.render(message, True, color)
+        text = self.text_cache.render(message, font_size, color, bold=True)
         rect = text.get_rect(center=(w // 2, panel_y + panel_height // 2 - 20))
         self.win.blit(text, rect)
 
-        button_width = 120
-        button_height = 40
-        close_rect = pygame.Rect(
-            w // 2 - button_width // 2,
-            panel_y + panel_height - button_height - 10,
-            button_width,
-            button_height
-        )
+        close_rect = self.layout.message_close
         close_label = "Cerrar" if self.language == "es" else "Close"
-        button_font = pygame.font.SysFont("Arial", 22, bold=True)
-        button_text = button_font.render(close_label, True, WHITE)
+        button_text = self.text_cache.render(close_label, 22, WHITE, bold=True)
         button_text_rect = button_text.get_rect(center=close_rect.center)
 
         pygame.draw.rect(self.win, (100, 40, 40), close_rect, border_radius=8)
         self.win.blit(button_text, button_text_rect)
 
-        pygame.display.flip()
-
-        waiting = True
-        while waiting:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    exit()
-                elif event.type == pygame.MOUSEBUTTONDOWN:
-                    if close_rect.collidepoint(event.pos):
-                        waiting = False
-
     def write_moves(self, move_log, sdb_posx, sdb_dimx, sdb_posy, sdb_dimy):
         line_height = 22
         max_visible_lines = int(sdb_dimy * 0.675 / line_height)
@@ -245,16 +414,15 @@ class Interface:
         y = sdb_posy + sdb_dimy * self.movestext_y
 
         for i, move in enumerate(displayed, start=self.scroll_offset + 1):
-            text = self.font_move.render(f"{i}. {move}", True, TEXT_COLOR)
+            text = self.text_cache.render(f"{i}. {move}", 18, TEXT_COLOR)
             self.win.blit(text, (x, y))
             y += line_height
 
     def draw_settings_panel(self):
-        w, h = self.win.get_size()
-        panel_width = w * 0.5
-        panel_height = h * 0.6
-        panel_x = (w - panel_width) // 2
-        panel_y = (h - panel_height) // 2
+        w, h = self.layout.width, self.layout.height
+        panel_rect = self.layout.settings_panel
+        panel_width, panel_height = panel_rect.size
+        panel_x, panel_y = panel_rect.topleft
 
         overlay = pygame.Surface((w, h), pygame.SRCALPHA)
         overlay.fill((0, 0, 0, 180))
@@ -265,12 +433,11 @@ class Interface:
         self.round_corners(panel, 12)
         self.win.blit(panel, (panel_x, panel_y))
 
-        font = pygame.font.SysFont("Arial", 24, bold=True)
-
         lang = self.language
         label_lang = "Idioma" if lang == "es" else "Language"
         label_sound = "Sonido" if lang == "es" else "Sound"
         label_theme = "Tema" if lang == "es" else "Theme"
+        label_opponent = "Rival" if lang == "es" else "Opponent"
         label_rules = "Ver reglas" if lang == "es" else "See rules"
         label_close = "Cerrar" if lang == "es" else "Close"
 
@@ -278,49 +445,40 @@ class Interface:
         val_no = "No" if lang == "es" else "No"
         val_dark = "Oscuro" if lang == "es" else "Dark"
         val_light = "Claro" if lang == "es" else "Light"
-
-        options = [
-            ("toggle_language", f"{label_lang}: {'Español' if lang == 'es' else 'English'}"),
-            ("toggle_sound", f"{label_sound}: {val_yes if self.sound_on else val_no}"),
-            ("toggle_theme", f"{label_theme}: {val_dark if self.dark_theme else val_light}"),
-            ("show_help", label_rules),
-        ]
-
-        self.settings_buttons.clear()
-        button_width = panel_width * 0.8
-        button_height = 45
-        spacing = 20
-        start_y = panel_y + 40
-
-        for i, (key, label) in enumerate(options):
-            btn_x = (w - button_width) // 2
-            btn_y = start_y + i * (button_height + spacing)
-            rect = pygame.Rect(btn_x, btn_y, button_width, button_height)
-
+        val_computer = "Ordenador" if lang == "es" else "Computer"
+        val_human = "Humano" if lang == "es" else "Human"
+
+        labels = {
+            "toggle_language": f"{label_lang}: {'Español' if lang == 'es' else 'English'}",
+            "toggle_sound": f"{label_sound}: {val_yes if self.sound_on else val_no}",
+            "toggle_theme": f"{label_theme}: {val_dark if self.dark_theme else val_light}",
+            "toggle_opponent": f"{label_opponent}: {val_computer if self.vs_computer else val_human}",
+            "show_help": label_rules,
+        }
+
+        for key in SETTINGS_KEYS:
+            rect = self.layout.settings_buttons[key]
             pygame.draw.rect(self.win, DARK, rect, border_radius=8)
-            text = font.render(label, True, WHITE)
+            text = self.text_cache.render(labels[key], 24, WHITE, bold=True)
             text_rect = text.get_rect(center=rect.center)
             self.win.blit(text, text_rect)
 
-            self.settings_buttons[key] = rect
-
-        close_y = start_y + len(options) * (button_height + spacing) + 10
-        close_rect = pygame.Rect((w - button_width) // 2, close_y, button_width, button_height)
+        close_rect = self.layout.settings_buttons["close_settings"]
         pygame.draw.rect(self.win, (100, 40, 40), close_rect, border_radius=8)
-        close_text = font.render(label_close, True, WHITE)
+        close_text = self.text_cache.render(label_close, 24, WHITE, bold=True)
         close_text_rect = close_text.get_rect(center=close_rect.center)
         self.win.blit(close_text, close_text_rect)
 
-        self.settings_buttons["close_settings"] = close_rect
-
     def handle_settings_click(self, pos):
-        for key, rect in self.settings_buttons.items():
+        for key, rect in self.layout.settings_buttons.items():
             if rect.collidepoint(pos):
                 return key
         return None
 
     def display_help(self):
-        font = pygame.font.SysFont("Arial", 20, bold=False)
+        self.help_open = True
+
+    def draw_help(self):
         rules = [
             "Reglas básicas del ajedrez:",
             "- Cada jugador mueve una pieza por turno.",
@@ -329,15 +487,14 @@ class Interface:
             "- Usa el botón 'Start' para reiniciar la partida.",
         ]
 
-        w, h = self.win.get_size()
+        w, h = self.layout.width, self.layout.height
         overlay = pygame.Surface((w, h), pygame.SRCALPHA)
         overlay.fill((0, 0, 0, 200))
         self.win.blit(overlay, (0, 0))
 
-        panel_width = w * 0.6
-        panel_height = h * 0.5
-        panel_x = (w - panel_width) // 2
-        panel_y = (h - panel_height) // 2
+        panel_rect = self.layout.help_panel
+        panel_width, panel_height = panel_rect.size
+        panel_x, panel_y = panel_rect.topleft
 
         panel = pygame.Surface((panel_width, panel_height), pygame.SRCALPHA)
         panel.fill((30, 30, 30, 240))
@@ -345,32 +502,29 @@ class Interface:
         self.win.blit(panel, (panel_x, panel_y))
 
         for i, line in enumerate(rules):
-            text = font.render(line, True, WHITE)
+            text = self.text_cache.render(line, 20, WHITE)
             self.win.blit(text, (panel_x + 30, panel_y + 30 + i * 30))
 
-        button_width = 100
-        button_height = 40
-        close_rect = pygame.Rect(
-            panel_x + (panel_width - button_width) // 2,
-            panel_y + panel_height - 60,
-            button_width,
-            button_height
-        )
+        close_rect = self.layout.help_close
         pygame.draw.rect(self.win, (100, 40, 40), close_rect, border_radius=8)
-        close_text = font.render("Cerrar", True, WHITE)
+        close_text = self.text_cache.render("Cerrar", 20, WHITE)
         self.win.blit(close_text, close_text.get_rect(center=close_rect.center))
 
-        pygame.display.flip()
-
-        waiting = True
-        while waiting:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    exit()
-                elif event.type == pygame.MOUSEBUTTONDOWN:
-                    if close_rect.collidepoint(event.pos):
-                        waiting = False
+    def has_overlay(self):
+        return self.help_open or bool(self.messages)
+
+    def handle_overlay_click(self, pos):
+        # Cierra la ventana superpuesta visible si se pulsa su botón "Cerrar".
+        # Devuelve True si se cerró alguna.
+        if self.help_open:
+            if self.layout.help_close.collidepoint(pos):
+                self.help_open = False
+                return True
+        elif self.messages:
+            if self.layout.message_close.collidepoint(pos):
+                self.messages.pop(0)
+                return True
+        return False
 
     def play_move_sound(self):
         if self.sound_on:
@@ -389,40 +543,75 @@ class Interface:
 
     def draw_coordinates(self):
         # Dibuja letras y números alrededor del tablero (a–h y 1–8)
-        h = self.win.get_size()[1]
-        margin = h * self.b_margin
-        square_size = h * self.b_size / 8
+        margin = self.layout.margin
+        square_size = self.layout.square_size
 
-        font = pygame.font.SysFont("Arial", int(square_size * 0.25), bold=True)
+        font_size = int(square_size * 0.25)
         files = "abcdefgh"
         ranks = "87654321"
 
         # Dibujar letras (a–h) abajo
         for i in range(8):
-            label = font.render(files[i], True, WHITE)
+            label = self.text_cache.render(files[i], font_size, WHITE, bold=True)
             x = margin + i * square_size + square_size / 2 - label.get_width() / 2
             y = margin + 8 * square_size + 2
             self.win.blit(label, (x, y))
 
         # Dibujar números (1–8) izquierda
         for i in range(8):
-            label = font.render(ranks[i], True, WHITE)
+            label = self.text_cache.render(ranks[i], font_size, WHITE, bold=True)
             x = margin - label.get_width() - 4
             y = margin + i * square_size + square_size / 2 - label.get_height() / 2
             self.win.blit(label, (x, y))
 
-    def update(self, positions, legal_moves=None, move_log=None, show_settings=False):
-        # Actualiza la pantalla en cada fotograma
-        self.win.fill(BLACK)
-        self.draw_board()
-        self.draw_pieces(positions)
-        sidebar = self.draw_sidebar()
-        if sidebar and move_log is not None:
-            self.write_moves(move_log, *sidebar)
-        if legal_moves:
-            self.draw_legal_moves_highlights(legal_moves)
-        if show_settings:
-            self.draw_settings_panel()
-        if self.start_pressed:
-            self.draw_coordinates()
-        pygame.display.flip()
+    def update(self, positions, legal_moves=None, move_log=None, show_settings=False, dirty=None, hint=None):
+        # Dibuja la pantalla. dirty indica qué zonas cambiaron ("board", "sidebar" o "all");
+        # si solo cambió el tablero o la barra lateral se repinta y se envía solo esa zona.
+        # Con una ventana superpuesta abierta siempre se repinta todo (la ventana queda encima).
+        if dirty is None or "all" in dirty or show_settings or self.has_overlay():
+            self.win.fill(BLACK)
+            self.draw_board()
+            self.draw_pieces(positions)
+            sidebar = self.draw_sidebar()
+            if sidebar and move_log is not None:
+                self.write_moves(move_log, *sidebar)
+            if hint:
+                self.draw_hint(hint)
+            if legal_moves:
+                self.draw_legal_moves_highlights(legal_moves)
+            if show_settings:
+                self.draw_settings_panel()
+            if self.start_pressed:
+                self.draw_coordinates()
+            if self.help_open:
+                self.draw_help()
+            elif self.messages:
+                self.draw_message(*self.messages[0])
+            pygame.display.flip()
+            return
+
+        board_rect = self.layout.board_region
+        sidebar_rect = self.layout.sidebar_region
+        rects = []
+        if "board" in dirty:
+            self.win.set_clip(board_rect)
+            self.win.fill(BLACK, board_rect)
+            self.draw_board()
+            self.draw_pieces(positions)
+            if hint:
+                self.draw_hint(hint)
+            if legal_moves:
+                self.draw_legal_moves_highlights(legal_moves)
+            if self.start_pressed:
+                self.draw_coordinates()
+            rects.append(board_rect)
+        if "sidebar" in dirty:
+            self.win.set_clip(sidebar_rect)
+            self.win.fill(BLACK, sidebar_rect)
+            sidebar = self.draw_sidebar()
+            if sidebar and move_log is not None:
+                self.write_moves(move_log, *sidebar)
+            rects.append(sidebar_rect)
+        self.win.set_clip(None)
+        pygame.display.update(rects)
+
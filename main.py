@@ -1,11 +1,20 @@
-
 # Punto de entrada del juego de ajedrez. Inicializa Pygame, crea la ventana y gestiona el bucle principal.
+import argparse
 import pygame
 import sys
 
 import Presenter
 
+# Tiempo máximo (ms) que el bucle duerme esperando eventos cuando no hay nada que hacer
+IDLE_TIMEOUT_MS = 500
+
 def main():
+    # Argumentos opcionales: fichero PGN donde guardar las partidas, libro de aperturas y tablas de finales
+    parser = argparse.ArgumentParser(description="Juego de ajedrez")
+    parser.add_argument("pgn", nargs="?", default=None, help="fichero PGN en el que guardar las partidas")
+    parser.add_argument("--book", default=None, help="libro de aperturas (Book.py) para el ordenador y las pistas")
+    parser.add_argument("--tablebase", default=None, help="directorio de tablas de finales (Tablebase.py)")
+    args = parser.parse_args()
     # Inicializa todos los módulos de Pygame
     pygame.init()
     # Dimensiones iniciales de la ventana
@@ -17,23 +26,34 @@ def main():
     # Reloj para controlar los FPS
     clock = pygame.time.Clock()
     # Crea una instancia del presentador, que conecta la vista y el modelo
-    presenter = Presenter.ChessPresenter(win)
+    presenter = Presenter.ChessPresenter(win, pgn_path=args.pgn, book_path=args.book, tablebase_dir=args.tablebase)
     # Bucle principal del juego
     running = True
     while running:
-        clock.tick(60)  # 60 FPS
+        if presenter.needs_polling():
+            clock.tick(60)  # 60 FPS mientras haya algo que dibujar o el motor esté pensando
+            events = pygame.event.get()
+        else:
+            # En reposo se duerme hasta que llegue un evento (o venza el tiempo de espera)
+            events = [pygame.event.wait(IDLE_TIMEOUT_MS)] + pygame.event.get()
         # Procesamiento de eventos
-        for event in pygame.event.get():
+        for event in events:
             if event.type == pygame.QUIT:
                 running = False # Cierra la ventana
+            elif event.type == pygame.VIDEORESIZE:
+                presenter.handle_resize() # Vuelve a escalar tablero y piezas al nuevo tamaño
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                presenter.mark_dirty() # La ventana volvió a mostrarse y hay que repintarla
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 presenter.handle_click(event.pos) # Llama al presentador para gestionar clics
+            elif event.type == pygame.MOUSEWHEEL:
+                presenter.scroll_moves(-event.y) # Scroll del registro de movimientos
             elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
-                if presenter.settings_open:
-                    presenter.settings_open = False # Cierra el panel de configuración
+                presenter.close_settings()
         # Actualiza la pantalla a través del presentador
         presenter.update()
     # Al cerrar el juego
+    presenter.close()
     pygame.quit()
     sys.exit()
 
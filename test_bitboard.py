@@ -0,0 +1,89 @@
+# Partidas aleatorias (con semilla fija) para comprobar el motor de bitboards contra las clases de Model
+# y el estado que Board mantiene de forma incremental.
+# Uso: python -m pytest -q
+import random
+
+import pytest
+
+import Bitboard
+import Evaluation
+import Model as m
+import Perft
+
+SEEDS = range(12)
+MAX_PLIES = 120
+
+
+def random_game(seed):
+    # Genera (tablero, tablero_con_bitboards) tras cada jugada de una partida aleatoria, jugando lo
+    # mismo en los dos para que el segundo mantenga sus bitboards de forma incremental
+    rng = random.Random(seed)
+    board = m.Board()
+    bitboard_board = m.Board(use_bitboards=True)
+    for _ in range(MAX_PLIES):
+        moves = board.legal_moves(board.turn)
+        if not moves:
+            return
+        piece_key, start, end = rng.choice(moves)
+        board.make_move(piece_key, start, end)
+        bitboard_board.make_move(piece_key, start, end)
+        yield board, bitboard_board
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_cross_check(seed):
+    for board, _ in random_game(seed):
+        assert Bitboard.cross_check(board) == [], board.to_fen()
+
+
+def same_bitboards(board):
+    # Los bitboards que make_move/unmake_move actualizan con XOR coinciden con los recalculados
+    fresh = Bitboard.BitboardBoard(board.current_positions)
+    bitboards = board.bitboards
+    return (bitboards.pieces, bitboards.occupied, bitboards.all_occupied) == (
+        fresh.pieces, fresh.occupied, fresh.all_occupied
+    )
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_same_legal_moves(seed):
+    for board, bitboard_board in random_game(seed):
+        assert same_bitboards(bitboard_board), board.to_fen()
+        assert sorted(bitboard_board.legal_moves(board.turn)) == sorted(board.legal_moves(board.turn)), board.to_fen()
+    while bitboard_board.move_stack:
+        bitboard_board.unmake_move()
+        assert same_bitboards(bitboard_board), bitboard_board.to_fen()
+
+
+@pytest.mark.parametrize("use_bitboards", [False, True])
+@pytest.mark.parametrize("name", sorted(Perft.REFERENCE_POSITIONS))
+def test_perft(name, use_bitboards):
+    # Recuentos de referencia hasta profundidad 3 con los dos motores
+    for depth, expected in sorted(Perft.REFERENCE_POSITIONS[name]["counts"].items()):
+        if depth > 3:
+            break
+        assert Perft.perft(Perft.load_position(name, use_bitboards), depth) == expected, (name, depth)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_incremental_hash(seed):
+    # El hash Zobrist de make_move coincide con el recalculado, y unmake_move lo deja como estaba
+    hashes = []
+    for board, _ in random_game(seed):
+        assert board.hash == board.compute_hash(), board.to_fen()
+        hashes.append(board.hash)
+    while board.move_stack:
+        assert board.hash == hashes.pop()
+        board.unmake_move()
+        assert board.hash == board.compute_hash(), board.to_fen()
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_incremental_eval(seed):
+    # Las sumas de la evaluación que mantiene make_move/unmake_move coinciden con las recalculadas
+    for board, _ in random_game(seed):
+        assert (board.eval_mg, board.eval_eg, board.phase) == Evaluation.compute_terms(board.current_positions)
+        assert board.eval() == Evaluation.evaluate(board), board.to_fen()
+    while board.move_stack:
+        board.unmake_move()
+        assert (board.eval_mg, board.eval_eg, board.phase) == Evaluation.compute_terms(board.current_positions)
@@ -0,0 +1,61 @@
+# Lectura y escritura de FEN: ida y vuelta sobre las partidas aleatorias de test_bitboard, FEN no válidos
+# y hash de un tablero creado desde FEN frente al mismo tablero alcanzado jugando.
+# Uso: python -m pytest -q
+import pytest
+
+import Model as m
+from test_bitboard import SEEDS, random_game
+
+INVALID_FENS = [
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP w KQkq - 0 1",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBN w KQkq - 0 1",
+    "rnbqkbnr/pppppppp/9/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+    "rnbqkbnr/ppppxppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR x KQkq - 0 1",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkx - 0 1",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - x 1",
+    "rnbqkbnr/pppp1ppp/8/4p3/8/8/PPPPPPPP/RNBQKBNR w KQkq e0 0 2",
+    "rnbqkbnr/pppp1ppp/8/4p3/8/8/PPPPPPPP/RNBQKBNR w KQkq e9 0 2",
+    "rnbqkbnr/pppp1ppp/8/4p3/8/8/PPPPPPPP/RNBQKBNR w KQkq e10 0 2",
+    "rnbqkbnr/pppp1ppp/8/4p3/8/8/PPPPPPPP/RNBQKBNR w KQkq e 0 2",
+    "rnbqkbnr/pppp1ppp/8/4p3/8/8/PPPPPPPP/RNBQKBNR w KQkq i6 0 2",
+    "rnbqkbnr/pppp1ppp/8/4p3/8/8/PPPPPPPP/RNBQKBNR w KQkq e4 0 2",
+]
+
+
+def play(board, moves):
+    # Juega sobre board jugadas origen-destino como "e2e4 e7e5"
+    for move in moves.split():
+        start = m.notation_to_pos(move[:2])
+        board.make_move(board.piece_at(start), start, m.notation_to_pos(move[2:4]))
+    return board
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_round_trip(seed):
+    for board, _ in random_game(seed):
+        fen = board.to_fen()
+        copy = m.Board.from_fen(fen)
+        assert copy.to_fen() == fen
+        assert copy.hash == board.hash, fen
+        assert (copy.eval_mg, copy.eval_eg, copy.phase) == (board.eval_mg, board.eval_eg, board.phase)
+        assert sorted(copy.legal_moves(copy.turn)) == sorted(board.legal_moves(board.turn)), fen
+
+
+@pytest.mark.parametrize("fen", INVALID_FENS)
+def test_invalid_fen(fen):
+    with pytest.raises(ValueError):
+        m.Board.from_fen(fen)
+
+
+@pytest.mark.parametrize("moves, fen", [
+    ("", "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"),
+    ("e2e4", "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1"),
+    ("e2e4 a7a6 e4e5 d7d5", "rnbqkbnr/1pp1pppp/p7/3pP3/8/8/PPPP1PPP/RNBQKBNR w KQkq d6 0 3"),
+    ("g1f3 g8f6 h1g1 h8g8", "rnbqkbr1/pppppppp/5n2/8/8/5N2/PPPPPPPP/RNBQKBR1 w Qq - 4 3"),
+])
+def test_hash_matches_moves(moves, fen):
+    board = play(m.Board(), moves)
+    assert board.to_fen() == fen
+    assert m.Board.from_fen(fen).hash == board.hash
@@ -0,0 +1,26 @@
+# Escritura y lectura de PGN: etiquetas con caracteres escapados y partidas no válidas en la validación.
+# Uso: python -m pytest -q
+import Pgn
+
+
+def test_tag_escaping_round_trip():
+    headers = {"White": 'O"Brien', "Black": "C:\\engines\\x", "Annotator": 'say \\"hi\\"'}
+    text = Pgn.game_to_pgn(["e4", "e5"], "1-0", headers)
+    assert '[White "O\\"Brien"]' in text
+    game = Pgn.parse_game(text)
+    assert {key: game.headers[key] for key in headers} == headers
+    assert game.moves == ["e4", "e5"]
+    assert game.result == "1-0"
+
+
+def test_invalid_fen_tag_is_reported():
+    games = [
+        Pgn.game_to_pgn(["e4", "e5"], "1-0", {"Round": "1"}),
+        Pgn.game_to_pgn(["e4"], "*", {"Round": "2", "SetUp": "1",
+                                      "FEN": "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq e0 0 1"}),
+        Pgn.game_to_pgn(["d4", "d5"], "0-1", {"Round": "3"}),
+    ]
+    result = Pgn._validate_batch(games)
+    assert result["games"] == 3
+    assert result["plies"] == 4
+    assert [(round_, error.split(":")[0]) for _, round_, error in result["errors"]] == [("2", "FEN")]